@@ -0,0 +1,38 @@
+from __future__ import print_function, unicode_literals
+
+import ConfigParser
+import io
+import time
+
+from mopidy_beetslocal import Extension, actor
+
+
+def make_backend(library, **options):
+    """
+    A backend on library configured with the extension
+    defaults, updated with options
+    """
+    ext = Extension()
+    parser = ConfigParser.RawConfigParser()
+    parser.readfp(io.BytesIO(ext.get_default_config()))
+    values, errors = ext.get_config_schema().deserialize(
+        dict(parser.items('beetslocal')))
+    values['beetslibrary'] = library
+    values.update(options)
+    return actor.BeetsLocalBackend(config={'beetslocal': values}, audio=None)
+
+
+def timed(func, repeat=5):
+    """
+    Calls func repeat times, returns the best and mean duration in ms
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        durations.append((time.time() - start) * 1000)
+    return min(durations), sum(durations) / len(durations)
+
+
+def report(name, results):
+    print('%-40s %10.2f ms %10.2f ms' % ((name,) + results))
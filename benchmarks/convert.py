@@ -0,0 +1,73 @@
+"""
+Times converting synthetic find result sets into models, in one batch
+and one row at a time as the conversion worked before
+
+    python -m benchmarks.convert --rows 100000 --artists 500
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import logging
+import random
+
+from benchmarks import report, timed
+
+from mopidy_beetslocal.convert import RowConverter
+
+
+def track_rows(count, artists):
+    rows = []
+    for beets_id in range(1, count + 1):
+        artist = random.randrange(artists)
+        album = random.randrange(artists * 10)
+        rows.append((beets_id, 'Track %d' % beets_id, random.randint(1, 28),
+                     random.randint(1, 12), random.randint(1960, 2016),
+                     'Artist %d' % artist, 'Album %d' % album,
+                     'Composer %d' % artist, beets_id % 12 + 1, 1,
+                     random.uniform(60, 600), 320, '',
+                     'track-%d' % beets_id, 1400000000.0, 'Rock', 12, 1,
+                     'album-%d' % album, 'artist-%d' % artist,
+                     'Artist %d' % artist, 'artist-%d' % artist))
+    return rows
+
+
+def album_rows(count, artists):
+    rows = []
+    for beets_id in range(1, count + 1):
+        artist = random.randrange(artists)
+        rows.append((beets_id, 'Album %d' % beets_id, random.randint(1, 28),
+                     random.randint(1, 12), random.randint(1960, 2016),
+                     'Artist %d' % artist, 1, 'album-%d' % beets_id,
+                     b'/covers/%d.jpg' % beets_id, 'artist-%d' % artist))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--artists', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    random.seed(0)
+    tracks = track_rows(args.rows, args.artists)
+    albums = album_rows(args.rows // 10, args.artists)
+    print('%d track rows, %d album rows, %d artists'
+          % (len(tracks), len(albums), args.artists))
+
+    print('%-40s %13s %13s' % ('', 'best', 'mean'))
+    report('tracks per row', timed(
+        lambda: [RowConverter().tracks([row]) for row in tracks],
+        args.repeat))
+    report('tracks batched', timed(
+        lambda: RowConverter().tracks(tracks), args.repeat))
+    report('albums per row', timed(
+        lambda: [RowConverter().albums([row]) for row in albums],
+        args.repeat))
+    report('albums batched', timed(
+        lambda: RowConverter().albums(albums), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
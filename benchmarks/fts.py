@@ -0,0 +1,43 @@
+"""
+Compares substring search with the FTS5 full text index
+
+    python -m benchmarks.fts ~/.config/beets/library.db
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import logging
+import time
+
+from benchmarks import make_backend, report, timed
+
+QUERIES = [
+    ('any', {'any': ['love']}),
+    ('artist', {'artist': ['the']}),
+    ('track_name', {'track_name': ['night']}),
+    ('album and artist', {'album': ['live'], 'artist': ['a']}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('library')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    sql = make_backend(args.library).library
+    start = time.time()
+    indexed = make_backend(args.library, fts_index=True).library
+    print('sync full text index: %.2fs' % (time.time() - start))
+
+    print('%-40s %13s %13s' % ('', 'best', 'mean'))
+    for name, query in QUERIES:
+        report('sql ' + name,
+               timed(lambda: sql.search(dict(query)), args.repeat))
+        report('fts ' + name,
+               timed(lambda: indexed.search(dict(query)), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
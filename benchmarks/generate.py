@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Generates a synthetic beets library for benchmarks
+
+    python -m benchmarks.generate /tmp/library.db --items 100000
+
+Artists get albums on a skewed distribution, genres follow a weighted
+list, a share of names is non-ASCII and a share of paths is latin-1
+or not decodable at all, as in real collections. The same seed gives
+the same library.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+import beets.library
+
+GENRES = [('Rock', 30), ('Pop', 20), ('Electronic', 12), ('Jazz', 8),
+          ('Hip-Hop', 8), ('Classical', 6), ('Metal', 5), ('Folk', 4),
+          ('Soundtrack', 3), ('', 4)]
+NAMES = ['Björk', 'Sigur Rós', 'Motörhead', 'Мумий Тролль', '坂本龍一',
+         'Beyoncé', 'Röyksopp', 'Hüsker Dü', 'Cœur de pirate',
+         'Ólafur Arnalds', 'Mötley Crüe', 'Françoise Hardy']
+WORDS = ['love', 'night', 'blue', 'the', 'dream', 'fire', 'rain', 'heart',
+         'song', 'light', 'of', 'a', 'summer', 'ghost', 'city', 'Ärger',
+         'naïve', 'café', 'sueño', 'Δέλτα', 'звезда', '夜']
+COMPOSERS = ['Bach', 'Dvořák', 'Satie', 'Pärt', 'Gershwin', '']
+FORMATS = [('MP3', 'mp3', 320), ('FLAC', 'flac', 900), ('AAC', 'm4a', 256)]
+
+ITEM_COLUMNS = ('id', 'title', 'artist', 'albumartist', 'album', 'album_id',
+                'genre', 'composer', 'year', 'month', 'day', 'original_year',
+                'original_month', 'original_day', 'track', 'tracktotal',
+                'disc', 'disctotal', 'length', 'bitrate', 'format', 'mtime',
+                'added', 'path', 'comments', 'mb_trackid', 'mb_albumid',
+                'mb_artistid', 'mb_albumartistid')
+ALBUM_COLUMNS = ('id', 'album', 'albumartist', 'genre', 'year', 'month',
+                 'day', 'original_year', 'original_month', 'original_day',
+                 'disctotal', 'added', 'artpath', 'mb_albumid',
+                 'mb_albumartistid')
+
+
+def weighted(choices, rnd):
+    total = sum(weight for _, weight in choices)
+    point = rnd.uniform(0, total)
+    for value, weight in choices:
+        point -= weight
+        if point <= 0:
+            return value
+    return choices[-1][0]
+
+
+def words(rnd, low, high):
+    return ' '.join(rnd.choice(WORDS)
+                    for _ in range(rnd.randint(low, high))).capitalize()
+
+
+def encode_path(path, rnd):
+    """
+    utf-8 mostly, some latin-1 and some with bytes no encoding decodes
+    """
+    roll = rnd.random()
+    if roll < 0.03:
+        return path.encode('latin-1', 'replace')
+    if roll < 0.04:
+        return path.encode('utf-8') + b'\xff\xfe'
+    return path.encode('utf-8')
+
+
+def generate(path, items, seed=0):
+    """
+    Writes a library of about items tracks to path,
+    returns the number of items and albums written
+    """
+    rnd = random.Random(seed)
+    albums = max(items // 11, 1)
+    artists = ['%s %d' % (words(rnd, 1, 2), n)
+               for n in range(max(albums // 4, 1))]
+    artists[:len(NAMES)] = NAMES[:len(artists)]
+    beets.library.Library(path)
+    connection = sqlite3.connect(path)
+    item_rows = []
+    album_rows = []
+    item_id = 0
+    now = time.time()
+    for album_id in range(1, albums + 1):
+        various = rnd.random() < 0.05
+        # a few artists get most albums
+        artist_no = int(len(artists) * rnd.random() ** 2)
+        albumartist = 'Various Artists' if various else artists[artist_no]
+        album = words(rnd, 1, 4)
+        genre = weighted(GENRES, rnd)
+        year = rnd.randint(1955, 2018)
+        month, day = rnd.choice([(0, 0), (rnd.randint(1, 12),
+                                          rnd.randint(1, 28))])
+        tracktotal = rnd.randint(6, 16)
+        fmt, ext, bitrate = rnd.choice(FORMATS)
+        folder = '/music/%s/%s' % (albumartist, album)
+        artpath = None
+        if rnd.random() < 0.3:
+            artpath = encode_path(folder + '/cover.jpg', rnd)
+        album_rows.append((
+            album_id, album, albumartist, genre, year, month, day, year,
+            month, day, 1, now, artpath, 'album-%d' % album_id,
+            'artist-%d' % artist_no))
+        for track in range(1, tracktotal + 1):
+            item_id += 1
+            artist = albumartist
+            artist_id = 'artist-%d' % artist_no
+            if various:
+                other = rnd.randrange(len(artists))
+                artist, artist_id = artists[other], 'artist-%d' % other
+            title = words(rnd, 1, 5)
+            item_rows.append((
+                item_id, title, artist, albumartist, album, album_id, genre,
+                rnd.choice(COMPOSERS), year, month, day, year, month, day,
+                track, tracktotal, 1, 1, rnd.uniform(90, 600), bitrate,
+                fmt, now, now,
+                encode_path('%s/%02d %s.%s' % (folder, track, title, ext),
+                            rnd),
+                '', 'track-%d' % item_id, 'album-%d' % album_id, artist_id,
+                'artist-%d' % artist_no))
+    with connection:
+        connection.executemany(
+            'insert into albums (%s) values (%s)'
+            % (', '.join(ALBUM_COLUMNS), ', '.join('?' * len(ALBUM_COLUMNS))),
+            [row[:12] + (row[12] and sqlite3.Binary(row[12]),) + row[13:]
+             for row in album_rows])
+        connection.executemany(
+            'insert into items (%s) values (%s)'
+            % (', '.join(ITEM_COLUMNS), ', '.join('?' * len(ITEM_COLUMNS))),
+            [row[:23] + (sqlite3.Binary(row[23]),) + row[24:]
+             for row in item_rows])
+    connection.close()
+    return len(item_rows), len(album_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path')
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if os.path.exists(args.path):
+        parser.error('%s exists' % args.path)
+    start = time.time()
+    items, albums = generate(args.path, args.items, args.seed)
+    print('%d items and %d albums in %.2fs'
+          % (items, albums, time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Compares the SQL query path with the in-memory index
+
+    python -m benchmarks.index ~/.config/beets/library.db
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import logging
+import time
+
+from benchmarks import make_backend, report, timed
+
+QUERIES = [
+    ('search any', lambda lib: lib.search({'any': ['love']})),
+    ('search artist', lambda lib: lib.search({'artist': ['the']})),
+    ('find genre', lambda lib: lib.search({'genre': ['Rock']}, exact=True)),
+    ('browse root', lambda lib: lib.browse('beetslocal:root')),
+    ('browse genre', lambda lib: lib.browse('beetslocal:genre?genre=Rock')),
+    ('get_distinct artist', lambda lib: lib.get_distinct('artist')),
+    ('get_distinct genre', lambda lib: lib.get_distinct('genre')),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('library')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    start = time.time()
+    sql = make_backend(args.library).library
+    print('open library: %.2fs' % (time.time() - start))
+    start = time.time()
+    memory = make_backend(args.library, in_memory_index=True).library
+    print('build index: %.2fs' % (time.time() - start))
+
+    print('%-40s %13s %13s' % ('', 'best', 'mean'))
+    for name, query in QUERIES:
+        report('sql ' + name, timed(lambda: query(sql), args.repeat))
+        report('index ' + name, timed(lambda: query(memory), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Compares looking up a playlist one uri at a time with lookup_many
+
+    python -m benchmarks.lookup ~/.config/beets/library.db --size 2000
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import logging
+
+from benchmarks import make_backend, report, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('library')
+    parser.add_argument('--size', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    library = make_backend(args.library).library
+    uris = [track.uri for track in library.search().tracks[:args.size]]
+    print('%d uris' % len(uris))
+
+    print('%-40s %13s %13s' % ('', 'best', 'mean'))
+    report('lookup per uri', timed(
+        lambda: [library.lookup(uri) for uri in uris], args.repeat))
+    report('lookup_many', timed(
+        lambda: library.lookup_many(uris), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures query throughput of parallel clients with the beets
+connection and with the read only connection pool
+
+    python -m benchmarks.pool ~/.config/beets/library.db --clients 4
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import logging
+import threading
+import time
+
+from benchmarks import make_backend
+
+REQUESTS = [
+    lambda lib: lib.browse('beetslocal:root'),
+    lambda lib: lib.get_distinct('artist'),
+    lambda lib: lib.browse('beetslocal:genre?genre=Rock'),
+]
+
+
+def throughput(library, clients, duration):
+    """
+    Requests per second of clients threads calling library
+    """
+    done = []
+    deadline = time.time() + duration
+
+    def client():
+        count = 0
+        while time.time() < deadline:
+            REQUESTS[count % len(REQUESTS)](library)
+            count += 1
+        done.append(count)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / float(duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('library')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    for size in (0, args.clients):
+        library = make_backend(args.library,
+                               connection_pool_size=size).library
+        print('pool size %d: %8.1f requests/s' % (
+            size, throughput(library, args.clients, args.duration)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Times search, find, browse at every level, lookup and get_distinct
+on a library and writes a JSON report. Reports of two runs, say
+before and after a change, can be compared.
+
+    python -m benchmarks.generate /tmp/library.db --items 100000
+    python -m benchmarks.suite /tmp/library.db --output before.json
+    python -m benchmarks.suite /tmp/library.db --output after.json \\
+        --compare before.json --set in_memory_index=true
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import datetime
+import json
+import logging
+import platform
+import sqlite3
+import time
+
+from benchmarks import make_backend, report, timed
+
+from mopidy_beetslocal import Extension
+
+DISTINCT_FIELDS = ('artist', 'albumartist', 'album', 'composer', 'genre',
+                   'date', 'track_name', 'disc_no')
+
+
+def most_common(path, column, table):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(
+            'select %s from %s where %s != "" group by %s '
+            'order by count(*) desc limit 1'
+            % (column, table, column, column)).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def operations(path, library):
+    """
+    Names and callables of the timed operations, the values queried
+    are the most common ones of the library
+    """
+    genre = most_common(path, 'genre', 'albums')
+    artist = most_common(path, 'albumartist', 'albums')
+    artist_id = most_common(path, 'mb_albumartistid', 'albums')
+    album = most_common(path, 'album', 'albums')
+    album_id = most_common(path, 'id', 'albums')
+    word = artist.split()[0]
+    track_uris = [t.uri for t in library.search(
+        {'genre': [genre]}, exact=True).tracks[:500]]
+    album_uris = ['beetslocal:album:%d:' % n for n in range(1, 101)]
+    ops = [
+        ('search any', lambda: library.search({'any': [word]})),
+        ('search artist', lambda: library.search({'artist': [word]})),
+        ('search track_name', lambda: library.search(
+            {'track_name': ['love']})),
+        ('find artist', lambda: library.search(
+            {'artist': [artist]}, exact=True)),
+        ('find genre', lambda: library.search(
+            {'genre': [genre]}, exact=True)),
+        ('find album', lambda: library.search(
+            {'album': [album]}, exact=True)),
+        ('browse root', lambda: library.browse('beetslocal:root')),
+        ('browse genre', lambda: library.browse(
+            'beetslocal:genre?genre=%s' % genre)),
+        ('browse artist', lambda: library.browse(
+            'beetslocal:artist?genre=%s&artist=%s' % (genre, artist_id))),
+        ('browse album', lambda: library.browse(
+            'beetslocal:album?album=%d' % album_id)),
+        ('lookup 500 tracks', lambda: [library.lookup(uri)
+                                       for uri in track_uris]),
+        ('lookup_many 500 tracks', lambda: library.lookup_many(track_uris)),
+        ('lookup_many 100 albums', lambda: library.lookup_many(album_uris)),
+    ]
+    for field in DISTINCT_FIELDS:
+        ops.append(('get_distinct %s' % field,
+                    lambda field=field: library.get_distinct(field)))
+        ops.append(('get_distinct %s by genre' % field,
+                    lambda field=field: library.get_distinct(
+                        field, {'genre': [genre]})))
+    return ops
+
+
+def parse_options(values):
+    """
+    name=value pairs deserialized by the extension config schema
+    """
+    schema = Extension().get_config_schema()
+    options = {}
+    for value in values:
+        name, _, raw = value.partition('=')
+        options[name] = schema[name].deserialize(raw)
+    return options
+
+
+def compare(results, path):
+    with open(path) as f:
+        baseline = json.load(f)['results']
+    print('\n%-40s %12s %12s %8s' % ('mean', 'baseline', 'this run', 'ratio'))
+    for name in sorted(results):
+        if name in baseline:
+            old, new = baseline[name]['mean_ms'], results[name]['mean_ms']
+            print('%-40s %9.2f ms %9.2f ms %7.2fx'
+                  % (name, old, new, new / old if old else 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('library')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--set', action='append', default=[],
+                        metavar='OPTION=VALUE',
+                        help='extension option, may be repeated')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', metavar='REPORT',
+                        help='print the ratios to an earlier report')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    options = parse_options(args.set)
+    start = time.time()
+    library = make_backend(args.library, **options).library
+    startup = (time.time() - start) * 1000
+    results = {'startup': {'best_ms': round(startup, 3),
+                           'mean_ms': round(startup, 3)}}
+    print('%-40s %13s %13s' % ('', 'best', 'mean'))
+    report('startup', (startup, startup))
+    for name, operation in operations(args.library, library):
+        best, mean = timed(operation, args.repeat)
+        report(name, (best, mean))
+        results[name] = {'best_ms': round(best, 3), 'mean_ms': round(mean, 3)}
+
+    connection = sqlite3.connect(args.library)
+    items, albums = [connection.execute(
+        'select count(*) from %s' % table).fetchone()[0]
+        for table in ('items', 'albums')]
+    connection.close()
+    result = {
+        'created': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'library': {'path': args.library, 'items': items, 'albums': albums},
+        'options': dict((name, '%s' % value)
+                        for name, value in options.items()),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
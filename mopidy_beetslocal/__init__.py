@@ -23,8 +23,31 @@ class Extension(ext.Extension):
         schema = super(Extension, self).get_config_schema()
         schema[u'beetslibrary'] = config.Path()
         schema[u'use_original_release_date'] = config.Boolean(optional=True)
+        schema[u'in_memory_index'] = config.Boolean(optional=True)
+        schema[u'model_cache_size'] = config.Integer(optional=True,
+                                                     minimum=0)
+        schema[u'search_all_limit'] = config.Integer(optional=True,
+                                                     minimum=0)
+        schema[u'fts_index'] = config.Boolean(optional=True)
+        schema[u'refresh_interval'] = config.Integer(optional=True,
+                                                     minimum=0)
+        schema[u'connection_pool_size'] = config.Integer(optional=True,
+                                                         minimum=0)
+        schema[u'browse_cache'] = config.Boolean(optional=True)
+        schema[u'create_indexes'] = config.Boolean(optional=True)
+        schema[u'distinct_index'] = config.Boolean(optional=True)
+        schema[u'thumbnail_size'] = config.Integer(optional=True, minimum=0)
+        schema[u'query_timeout'] = config.Integer(optional=True, minimum=0)
+        schema[u'metrics_file'] = config.Path(optional=True)
+        schema[u'metrics_interval'] = config.Integer(optional=True,
+                                                     minimum=1)
+        schema[u'snapshot'] = config.Boolean(optional=True)
         return schema
 
+    def get_command(self):
+        from .commands import BeetsLocalCommand
+        return BeetsLocalCommand()
+
     def setup(self, registry):
         from actor import BeetsLocalBackend
         registry.add(u'backend', BeetsLocalBackend)
@@ -4,7 +4,10 @@ from mopidy import backend
 
 import pykka
 
+from .changes import LibraryWatcher
 from .library import BeetsLocalLibraryProvider
+from .metrics import MetricsWriter, metered
+from .uri import file_uri, parse
 
 logger = logging.getLogger(__name__)
 
@@ -16,30 +19,73 @@ class BeetsLocalBackend(pykka.ThreadingActor, backend.Backend):
         self.beetslibrary = config['beetslocal']['beetslibrary']
         self.use_original_release_date = config['beetslocal'][
             'use_original_release_date']
-        logger.debug("Got library %s" % (self.beetslibrary))
+        self.in_memory_index = config['beetslocal']['in_memory_index']
+        self.model_cache_size = config['beetslocal']['model_cache_size']
+        self.search_all_limit = config['beetslocal']['search_all_limit']
+        self.fts_index = config['beetslocal']['fts_index']
+        self.refresh_interval = config['beetslocal']['refresh_interval']
+        self.connection_pool_size = config['beetslocal'][
+            'connection_pool_size']
+        self.browse_cache = config['beetslocal']['browse_cache']
+        self.create_indexes = config['beetslocal']['create_indexes']
+        self.distinct_index = config['beetslocal']['distinct_index']
+        self.thumbnail_size = config['beetslocal']['thumbnail_size']
+        self.query_timeout = config['beetslocal']['query_timeout']
+        self.metrics_file = config['beetslocal']['metrics_file']
+        self.metrics_interval = config['beetslocal']['metrics_interval']
+        self.snapshot = config['beetslocal']['snapshot']
+        logger.debug("Got library %s", self.beetslibrary)
         self.playback = BeetsLocalPlaybackProvider(audio=audio, backend=self)
         self.library = BeetsLocalLibraryProvider(backend=self)
         self.playlists = None
         self.uri_schemes = ['beetslocal']
+        self.watcher = None
+        self.metrics_writer = None
+
+    def on_start(self):
+        if self.refresh_interval:
+            self.watcher = LibraryWatcher(
+                self.beetslibrary, self.refresh_interval,
+                self.actor_ref.proxy().library.refresh)
+            self.watcher.start()
+        if self.metrics_file:
+            self.metrics_writer = MetricsWriter(
+                self.library.metrics, self.metrics_file,
+                self.metrics_interval)
+            self.metrics_writer.start()
+
+    def on_stop(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.metrics_writer is not None:
+            self.metrics_writer.stop()
+        if self.snapshot:
+            self.library.save_snapshot()
 
     def _extract_uri(self, uri):
-        logger.debug("convert uri = %s" % uri.encode('ascii', 'ignore'))
-        if not uri.startswith('beetslocal:'):
-            raise ValueError('Invalid URI.')
-        path = uri.split(b':', 3)[3]
-        beets_id = uri.split(b':', 3)[2]
-        item_type = uri.split(b':', 3)[1]
-        logger.debug("extracted path = %s id = %s type = %s" % (
-            path.encode('ascii', 'ignore'), beets_id, item_type))
+        item_type, beets_id, path = parse(uri)
         return {'path': path,
-                'beets_id': int(beets_id),
+                'beets_id': beets_id,
                 'item_type': item_type}
 
 
 class BeetsLocalPlaybackProvider(backend.PlaybackProvider):
 
+    @property
+    def metrics(self):
+        return self.backend.library.metrics
+
+    @metered('translate_uri')
     def translate_uri(self, uri):
         logger.debug('translate_uri called %s', uri)
-        local_uri = 'file://%s' % self.backend._extract_uri(uri)['path']
-        logger.debug('local_uri: %s' % local_uri)
+        try:
+            item_type, beets_id, path = parse(uri)
+        except ValueError:
+            logger.debug('Can not play %s', uri)
+            return None
+        path = self.backend.library.get_path(beets_id) or path
+        if not path:
+            return None
+        local_uri = file_uri(path)
+        logger.debug('local_uri: %s', local_uri)
         return local_uri
@@ -0,0 +1,86 @@
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def browse_key(level, query):
+    """
+    The cache key of a browse level, None if it is not cached
+    """
+    query = query or {}
+    genre = query.get('genre', [None])[0]
+    if level == 'root':
+        return ('root',)
+    elif level == 'genre':
+        return ('genre', genre)
+    elif level == 'artist':
+        return ('artist', genre, query.get('artist', [None])[0])
+    elif level == 'album':
+        return ('album', query.get('album', [None])[0])
+    return None
+
+
+class BrowseCache(object):
+    """
+    Ref lists of browsed directories, built on first browse.
+    Knows genre and album artist of every album, so a changed album
+    only drops the listings it appears in: the root, the genre and
+    artist directories it was and is filed under and its own
+    track list.
+    """
+
+    def __init__(self):
+        self._listings = {}
+        self._albums = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._listings)
+
+    def get(self, key):
+        return self._listings.get(key)
+
+    def put(self, key, refs):
+        if key is not None:
+            with self._lock:
+                self._listings[key] = refs
+
+    def track(self, rows):
+        """
+        Records genre and album artist of albums
+        from rows of (id, genre, mb_albumartistid)
+        """
+        with self._lock:
+            for album_id, genre, artist in rows:
+                self._albums[album_id] = (genre, artist)
+
+    def invalidate(self, album_ids, rows):
+        """
+        Drops the listings albums with album_ids appear in.
+        rows hold (id, genre, mb_albumartistid) of those still
+        in the library.
+        """
+        with self._lock:
+            genres = set()
+            artists = set()
+            for album_id in album_ids:
+                old = self._albums.pop(album_id, None)
+                if old is not None:
+                    genres.add(old[0])
+                    artists.add(old[1])
+            for album_id, genre, artist in rows:
+                self._albums[album_id] = (genre, artist)
+                genres.add(genre)
+                artists.add(artist)
+            album_keys = set(unicode(album_id) for album_id in album_ids)
+            # an artist's directories are dropped for every genre,
+            # they are cheap to rebuild
+            for key in self._listings.keys():
+                if (key[0] == 'root' or
+                        key[0] == 'genre' and key[1] in genres or
+                        key[0] == 'artist' and key[2] in artists or
+                        key[0] == 'album' and key[1] in album_keys):
+                    del self._listings[key]
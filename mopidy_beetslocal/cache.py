@@ -0,0 +1,73 @@
+from __future__ import unicode_literals
+
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache(object):
+    """
+    A bounded mapping that evicts the least recently used entry.
+    Entries may carry a stamp, a get with a different stamp
+    is a miss and drops the stale entry. Safe to share between
+    threads.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, stamp=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, stamp=None):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (stamp, value)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def items(self):
+        """
+        Keys and values, least recently used first
+        """
+        with self._lock:
+            return [(key, entry[1])
+                    for key, entry in self._entries.items()]
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'size': len(self._entries),
+                'capacity': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': float(self.hits) / lookups if lookups else 0.0}
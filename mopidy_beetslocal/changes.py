@@ -0,0 +1,164 @@
+from __future__ import unicode_literals
+
+import array
+import collections
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+Changes = collections.namedtuple('Changes', ['items', 'albums'])
+
+
+class ChangeTracker(object):
+    """
+    Remembers id and mtime of every item and id and added of
+    every album, scan() reports what changed since the last scan.
+    """
+
+    def __init__(self):
+        self.items = _Snapshot()
+        self.albums = _Snapshot()
+        self.marker = None
+
+    def to_snapshot(self):
+        return {'marker': self.marker, 'items': self.items.to_snapshot(),
+                'albums': self.albums.to_snapshot()}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        tracker = cls()
+        tracker.marker = data['marker']
+        tracker.items = _Snapshot.from_snapshot(data['items'])
+        tracker.albums = _Snapshot.from_snapshot(data['albums'])
+        return tracker
+
+    def changed(self, lib):
+        """
+        Whether the library files changed since the last scan
+        """
+        return self.marker != file_state(lib.path)
+
+    def scan(self, lib):
+        """
+        Ids of items and albums that were added, modified or removed.
+        Albums of touched items count as touched too, as album
+        edits reach the items but leave albums.added alone.
+        """
+        # taken first, writes during the scan show up next time
+        self.marker = file_state(lib.path)
+        with lib.transaction() as tx:
+            items = tx.query('select id, mtime, album_id from items '
+                             'order by id')
+            albums = tx.query('select id, added, 0 from albums order by id')
+        item_ids, item_albums = self.items.update(items)
+        album_ids, _ = self.albums.update(albums)
+        album_ids.update(item_albums)
+        album_ids.discard(None)
+        album_ids.discard(0)
+        return Changes(item_ids, album_ids)
+
+
+class _Snapshot(object):
+    """
+    Sorted ids with a stamp and a parent id each
+    """
+
+    def __init__(self):
+        self.ids = array.array(str('l'))
+        self.stamps = array.array(str('d'))
+        self.parents = array.array(str('l'))
+
+    def to_snapshot(self):
+        return (self.ids.tostring(), self.stamps.tostring(),
+                self.parents.tostring())
+
+    @classmethod
+    def from_snapshot(cls, data):
+        snapshot = cls()
+        for column, values in zip(
+                (snapshot.ids, snapshot.stamps, snapshot.parents), data):
+            column.fromstring(values)
+        return snapshot
+
+    def update(self, rows):
+        """
+        Replaces the snapshot with rows of (id, stamp, parent)
+        ordered by id. Returns the touched ids and their parents.
+        """
+        touched = set()
+        parents = set()
+        ids = array.array(str('l'))
+        stamps = array.array(str('d'))
+        new_parents = array.array(str('l'))
+        old = 0
+        for row_id, stamp, parent in rows:
+            stamp = stamp or 0.0
+            parent = parent or 0
+            while old < len(self.ids) and self.ids[old] < row_id:
+                touched.add(self.ids[old])
+                parents.add(self.parents[old])
+                old += 1
+            if old < len(self.ids) and self.ids[old] == row_id:
+                if (self.stamps[old] != stamp or
+                        self.parents[old] != parent):
+                    touched.add(row_id)
+                    parents.update((self.parents[old], parent))
+                old += 1
+            else:
+                touched.add(row_id)
+                parents.add(parent)
+            ids.append(row_id)
+            stamps.append(stamp)
+            new_parents.append(parent)
+        for pos in xrange(old, len(self.ids)):
+            touched.add(self.ids[pos])
+            parents.add(self.parents[pos])
+        self.ids, self.stamps, self.parents = ids, stamps, new_parents
+        return touched, parents
+
+
+def file_state(path):
+    """
+    mtime and size of the library file and its write ahead log,
+    None for missing files
+    """
+    state = []
+    for name in (path, path + b'-wal'):
+        try:
+            st = os.stat(name)
+            state.append((st.st_mtime, st.st_size))
+        except OSError:
+            state.append(None)
+    return state
+
+
+class LibraryWatcher(threading.Thread):
+    """
+    Polls the library file and its write ahead log every
+    interval seconds and calls callback once they changed.
+    """
+
+    def __init__(self, path, interval, callback):
+        super(LibraryWatcher, self).__init__(name='BeetsLocalWatcher')
+        self.daemon = True
+        self.path = path
+        self.interval = interval
+        self.callback = callback
+        self._stopped = threading.Event()
+        self._state = file_state(path)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            state = file_state(self.path)
+            if state != self._state:
+                self._state = state
+                logger.debug('Library file changed, refreshing')
+                try:
+                    self.callback()
+                except Exception as e:
+                    logger.error('BeetsLocalBackend: refresh failed: %s', e)
+
+    def stop(self):
+        self._stopped.set()
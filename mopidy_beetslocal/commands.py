@@ -0,0 +1,86 @@
+from __future__ import print_function, unicode_literals
+
+import json
+import logging
+
+from mopidy import commands
+
+from . import indexes
+
+logger = logging.getLogger(__name__)
+
+
+def _library(config):
+    import beets.library
+    return beets.library.Library(config['beetslocal']['beetslibrary'])
+
+
+class BeetsLocalCommand(commands.Command):
+
+    def __init__(self):
+        super(BeetsLocalCommand, self).__init__()
+        self.add_child('explain', ExplainCommand())
+        self.add_child('index', IndexCommand())
+        self.add_child('metrics', MetricsCommand())
+
+
+class ExplainCommand(commands.Command):
+    help = 'Show the SQLite query plan of every query the backend issues.'
+
+    def run(self, args, config):
+        with _library(config).transaction() as tx:
+            for name, statement, plan in indexes.explain(tx):
+                print('%s\n  %s' % (name, statement))
+                for detail in plan:
+                    print('    %s' % detail)
+        return 0
+
+
+class IndexCommand(commands.Command):
+    help = 'Create the indexes the backend queries need in the library.'
+
+    def __init__(self):
+        super(IndexCommand, self).__init__()
+        self.add_argument('--drop', action='store_true',
+                          help='Drop the indexes instead.')
+
+    def run(self, args, config):
+        with _library(config).transaction() as tx:
+            if args.drop:
+                indexes.drop_indexes(tx)
+                print('Dropped %d indexes.' % len(indexes.INDEXES))
+            else:
+                indexes.create_indexes(tx)
+                print('Created %d indexes.' % len(indexes.INDEXES))
+        return 0
+
+
+class MetricsCommand(commands.Command):
+    help = 'Summarize the metrics the running backend wrote to metrics_file.'
+
+    def run(self, args, config):
+        path = config['beetslocal']['metrics_file']
+        if not path:
+            print('metrics_file is not configured.')
+            return 1
+        try:
+            with open(path) as f:
+                metrics = json.load(f)
+        except (IOError, ValueError) as e:
+            print('Can not read %s: %s' % (path, e))
+            return 1
+        print('Uptime %(uptime_s)ss' % metrics)
+        for section in ('methods', 'statements'):
+            print('\n%-60s %8s %10s %10s %10s' % (
+                section, 'count', 'mean ms', 'p90 ms', 'total ms'))
+            timings = sorted(metrics[section].items(),
+                             key=lambda item: -item[1]['total_ms'])
+            for name, stats in timings:
+                print('%-60s %8d %10s %10s %10.1f' % (
+                    name[:60], stats['count'], stats['mean_ms'],
+                    stats['p90_ms'], stats['total_ms']))
+        for name in sorted(set(metrics) - set(['uptime_s', 'methods',
+                                               'statements'])):
+            print('\n%s: %s' % (name, json.dumps(metrics[name],
+                                                 sort_keys=True)))
+        return 0
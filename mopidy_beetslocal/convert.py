@@ -0,0 +1,113 @@
+from __future__ import unicode_literals
+
+import datetime
+
+from mopidy.models import Album, Artist, Track
+
+from .deadline import checkpoint
+from .images import image_uri
+from .uri import album_uri, artist_uri, track_uri
+
+
+class RowConverter(object):
+    """
+    Turns whole find result sets into models. Dates, artists and
+    albums shared by many rows are built once and the same instance
+    is handed to every track referring to them.
+    Rows are tuples in the column order of query.TRACK_SELECT and
+    query.ALBUM_SELECT.
+    """
+
+    def __init__(self):
+        self._dates = {}
+        self._artists = {}
+        self._albums = {}
+
+    def date(self, year, month, day):
+        """
+        YYYY-MM-DD or None if the parts do not make a date
+        """
+        key = (year, month, day)
+        try:
+            return self._dates[key]
+        except KeyError:
+            try:
+                date = '{:%Y-%m-%d}'.format(datetime.date(year, month, day))
+            except (TypeError, ValueError):
+                date = None
+            self._dates[key] = date
+            return date
+
+    def artist(self, kind, name, mbid, key):
+        """
+        Artist named name with an uri built from kind and key
+        """
+        cache_key = (kind, name, mbid, key)
+        artist = self._artists.get(cache_key)
+        if artist is None:
+            artist = self._artists[cache_key] = Artist(
+                name=name, musicbrainz_id=mbid,
+                uri=artist_uri(kind, key))
+        return artist
+
+    def album(self, name, date, artist, num_tracks, num_discs, mbid):
+        key = (name, date, artist, num_tracks, num_discs, mbid)
+        album = self._albums.get(key)
+        if album is None:
+            album = self._albums[key] = Album(
+                name=name, date=date, artists=[artist],
+                num_tracks=num_tracks, num_discs=num_discs,
+                musicbrainz_id=mbid, uri='beetslocal:mb_album:%s:' % mbid)
+        return album
+
+    def tracks(self, rows):
+        tracks = []
+        append = tracks.append
+        for (beets_id, title, day, month, year, artist, album, composer,
+             track, disc, length, bitrate, comments, mb_trackid, mtime,
+             genre, tracktotal, disctotal, mb_albumid, mb_albumartistid,
+             albumartist, mb_artistid) in rows:
+            checkpoint()
+            date = self.date(year, month, day)
+            composers = []
+            if composer:
+                composers.append(
+                    self.artist('composer', composer, '', composer))
+            append(Track(
+                name=title,
+                artists=[self.artist('artist', artist, mb_artistid,
+                                     mb_artistid)],
+                album=self.album(album, date,
+                                 self.artist('artist', albumartist,
+                                             mb_albumartistid,
+                                             mb_albumartistid),
+                                 tracktotal, disctotal, mb_albumid),
+                composers=composers,
+                track_no=track,
+                disc_no=disc,
+                date=date,
+                length=int(length or 0) * 1000,
+                bitrate=bitrate,
+                comment=comments,
+                musicbrainz_id=mb_trackid,
+                last_modified=int((mtime or 0) * 1000),
+                genre=genre,
+                uri=track_uri(beets_id)))
+        return tracks
+
+    def albums(self, rows):
+        albums = []
+        append = albums.append
+        for (beets_id, album, day, month, year, albumartist, disctotal,
+             mb_albumid, artpath, mb_albumartistid) in rows:
+            checkpoint()
+            append(Album(
+                name=album,
+                date=self.date(year, month, day),
+                artists=[self.artist('artist', albumartist,
+                                     mb_albumartistid, mb_albumartistid)],
+                num_discs=disctotal,
+                musicbrainz_id=mb_albumid,
+                images=[image_uri(artpath)] if artpath else [],
+                uri=album_uri(beets_id)))
+        return albums
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals
+
+import contextlib
+import threading
+import time
+
+# SQLite virtual machine instructions between deadline checks
+PROGRESS_STEPS = 1000
+
+_local = threading.local()
+
+
+class Cancelled(Exception):
+    """
+    Raised inside a query whose deadline passed or that was cancelled
+    """
+
+
+class Deadline(object):
+    """
+    Time limit of one query, None or 0 seconds for none.
+    While running() it is checked by the SQLite progress handler of
+    the connections the query uses and by checkpoint() calls in
+    Python loops, which abort the query by raising Cancelled.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.expires = time.time() + timeout if timeout else None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def expired(self):
+        return self.cancelled or (self.expires is not None and
+                                  time.time() > self.expires)
+
+    @contextlib.contextmanager
+    def running(self):
+        previous = getattr(_local, 'deadline', None)
+        _local.deadline = self
+        try:
+            yield self
+        finally:
+            _local.deadline = previous
+
+
+def checkpoint():
+    """
+    Raises Cancelled if the deadline running in this thread expired
+    """
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is not None and deadline.expired():
+        raise Cancelled()
+
+
+def progress_handler():
+    """
+    SQLite progress handler interrupting statements once the
+    deadline running in the calling thread expired
+    """
+    deadline = getattr(_local, 'deadline', None)
+    return int(deadline is not None and deadline.expired())
+
+
+def watch(connection):
+    """
+    Makes the deadlines of the threads using connection interrupt it
+    """
+    connection.set_progress_handler(progress_handler, PROGRESS_STEPS)
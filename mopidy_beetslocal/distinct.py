@@ -0,0 +1,161 @@
+from __future__ import unicode_literals
+
+import logging
+import time
+
+from .index import MAX_VARIABLES
+from .query import ITEM_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# mopidy get_distinct fields to the items columns holding their values
+DISTINCT_COLUMNS = {
+    'track_name': 'title',
+    'artist': 'artist',
+    'albumartist': 'albumartist',
+    'album': 'album',
+    'composer': 'composer',
+    'genre': 'genre',
+    'date': 'year',
+    'disc_no': 'disc',
+    'track_no': 'track',
+}
+
+# query keys a distinct lookup can be filtered by
+FILTER_COLUMNS = dict(ITEM_COLUMNS, **DISTINCT_COLUMNS)
+
+NUMERIC_COLUMNS = ('year', 'disc', 'track')
+
+
+def distinct_value(field, value):
+    """
+    The value get_distinct reports for a column value,
+    None for empty ones
+    """
+    if not value:
+        return None
+    if field == 'date':
+        return '%04d' % value
+    return value
+
+
+def column_value(column, value):
+    """
+    A query value converted to what column stores, None if it can
+    not match anything
+    """
+    if column in NUMERIC_COLUMNS:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return value
+
+
+class DistinctIndex(object):
+    """
+    Maps every value of every filterable items column to the ids
+    of the items having it, and every item id to its values.
+    Filtered distinct lookups intersect posting lists instead of
+    scanning the items table.
+    """
+
+    def __init__(self):
+        self.columns = sorted(set(FILTER_COLUMNS.values()))
+        self.postings = dict((column, {}) for column in self.columns)
+        self.values = dict((column, {}) for column in self.columns)
+
+    def __len__(self):
+        return len(self.values['title'])
+
+    @classmethod
+    def from_library(cls, lib):
+        start = time.time()
+        index = cls()
+        with lib.transaction() as tx:
+            for row in tx.query('select id, %s from items'
+                                % ', '.join(index.columns)):
+                index.put(row)
+        logger.info('Indexed distinct values of %d items in %.2fs',
+                    len(index), time.time() - start)
+        return index
+
+    def to_snapshot(self):
+        return {'postings': self.postings, 'values': self.values}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        index = cls()
+        index.postings = data['postings']
+        index.values = data['values']
+        return index
+
+    def put(self, row):
+        row = tuple(row)
+        item_id = row[0]
+        self.remove(item_id)
+        for column, value in zip(self.columns, row[1:]):
+            if value is None or value == '':
+                continue
+            self.postings[column].setdefault(value, set()).add(item_id)
+            self.values[column][item_id] = value
+
+    def remove(self, item_id):
+        for column in self.columns:
+            value = self.values[column].pop(item_id, None)
+            if value is None:
+                continue
+            ids = self.postings[column][value]
+            ids.discard(item_id)
+            if not ids:
+                del self.postings[column][value]
+
+    def reload(self, lib, item_ids):
+        """
+        Rereads the given items from lib,
+        ids no longer in the library are removed
+        """
+        ids = list(item_ids)
+        for item_id in ids:
+            self.remove(item_id)
+        with lib.transaction() as tx:
+            for start in range(0, len(ids), MAX_VARIABLES):
+                chunk = ids[start:start + MAX_VARIABLES]
+                for row in tx.query(
+                        'select id, %s from items where id in (%s)'
+                        % (', '.join(self.columns),
+                           ', '.join('?' * len(chunk))), chunk):
+                    self.put(row)
+
+    def matching(self, query):
+        """
+        Ids of the items matching every value of every query key,
+        None for queries without keys the index knows. Like find,
+        unknown keys are ignored.
+        """
+        ids = None
+        for key, values in query.iteritems():
+            column = FILTER_COLUMNS.get(key)
+            if column is None:
+                continue
+            for value in values:
+                matched = self.postings[column].get(
+                    column_value(column, value), set())
+                ids = set(matched) if ids is None else ids & matched
+                if not ids:
+                    return set()
+        return ids
+
+    def distinct(self, field, query=None):
+        column = DISTINCT_COLUMNS.get(field)
+        if column is None:
+            return set()
+        ids = self.matching(query or {})
+        if ids is None:
+            values = self.postings[column]
+        else:
+            values = set(self.values[column].get(item_id)
+                         for item_id in ids)
+        result = set(distinct_value(field, value) for value in values)
+        result.discard(None)
+        return result
@@ -0,0 +1,132 @@
+from __future__ import unicode_literals
+
+import logging
+import re
+import sqlite3
+import time
+
+from . import deadline
+
+logger = logging.getLogger(__name__)
+
+ITEM_FIELDS = ('title', 'artist', 'albumartist', 'album', 'composer',
+               'genre')
+ALBUM_FIELDS = ('album', 'albumartist', 'genre')
+
+# mopidy query keys to fts columns
+ITEM_KEYS = {'track_name': 'title', 'artist': 'artist',
+             'albumartist': 'albumartist', 'album': 'album',
+             'composer': 'composer', 'genre': 'genre'}
+ALBUM_KEYS = {'artist': 'albumartist', 'albumartist': 'albumartist',
+              'album': 'album', 'genre': 'genre'}
+
+TOKENS = re.compile(r'\w+', re.UNICODE)
+
+
+class FullTextIndex(object):
+    """
+    A SQLite FTS5 sidecar to the beets library holding the
+    searchable text of every item and album. sync() brings it
+    up to date by comparing it with the attached library.
+    """
+
+    def __init__(self, path, library):
+        self.path = path
+        self.library = library
+        # created by the actor constructor, used by the actor thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('ATTACH DATABASE ? AS beets', (library,))
+        deadline.watch(self.connection)
+        self._create('items_fts', ITEM_FIELDS)
+        self._create('albums_fts', ALBUM_FIELDS)
+
+    def _create(self, table, fields):
+        self.connection.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(%s, '
+            'tokenize="unicode61 remove_diacritics 1")'
+            % (table, ', '.join(fields)))
+
+    def close(self):
+        self.connection.close()
+
+    def sync(self):
+        """
+        Reindexes rows that were added, changed or removed in
+        the library since the last sync. Returns the number of
+        changed rows.
+        """
+        start = time.time()
+        with self.connection:
+            changed = (self._sync('items_fts', 'items', ITEM_FIELDS) +
+                       self._sync('albums_fts', 'albums', ALBUM_FIELDS))
+        logger.info('Full text index synced %d rows in %.2fs',
+                    changed, time.time() - start)
+        return changed
+
+    def _sync(self, table, source, fields):
+        execute = self.connection.execute
+        execute('DROP TABLE IF EXISTS temp.changed')
+        execute('CREATE TEMP TABLE changed AS SELECT s.id AS id '
+                'FROM beets.%s s LEFT JOIN %s f ON f.rowid = s.id '
+                'WHERE f.rowid IS NULL OR %s'
+                % (source, table, ' OR '.join(
+                    'f.%s IS NOT s.%s' % (field, field) for field in fields)))
+        changed = execute('SELECT count(*) FROM temp.changed').fetchone()[0]
+        removed = execute('DELETE FROM %s WHERE rowid IN '
+                          '(SELECT id FROM temp.changed) OR rowid NOT IN '
+                          '(SELECT id FROM beets.%s)'
+                          % (table, source)).rowcount
+        execute('INSERT INTO %s (rowid, %s) SELECT id, %s FROM beets.%s '
+                'WHERE id IN (SELECT id FROM temp.changed)'
+                % (table, ', '.join(fields), ', '.join(fields), source))
+        execute('DROP TABLE temp.changed')
+        return max(changed, removed)
+
+    def search_items(self, query):
+        """
+        Item ids matching query, best match first. None if the
+        query has keys the index does not cover.
+        """
+        return self._search('items_fts', query, ITEM_KEYS)
+
+    def search_albums(self, query):
+        return self._search('albums_fts', query, ALBUM_KEYS)
+
+    def _search(self, table, query, keys):
+        expression = build_match(query, keys)
+        if expression is None:
+            return None
+        if not expression:
+            return []
+        rows = self.connection.execute(
+            'SELECT rowid FROM %s WHERE %s MATCH ? ORDER BY rank'
+            % (table, table), (expression,))
+        return [row[0] for row in rows]
+
+
+def covers(query, keys):
+    """
+    Whether every key of query can be answered by the index
+    """
+    return all(key == 'any' or key in keys for key in query)
+
+
+def build_match(query, keys):
+    """
+    Translates a mopidy query into an FTS5 match expression.
+    Every word of every value has to prefix match a token in the
+    column the key maps to, or in any column for 'any'.
+    Returns None for keys the index does not cover and an empty
+    string for queries without any word.
+    """
+    if not covers(query, keys):
+        return None
+    terms = []
+    for key, values in query.iteritems():
+        for value in values:
+            for token in TOKENS.findall(value):
+                term = '"%s"*' % token
+                if key != 'any':
+                    term = '%s : %s' % (keys[key], term)
+                terms.append(term)
+    return ' AND '.join(terms)
@@ -0,0 +1,70 @@
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import os
+
+from mopidy.models import Image
+
+from .uri import file_uri
+
+logger = logging.getLogger(__name__)
+
+
+def image_uri(artpath):
+    """
+    file URI of a beets artpath, None without one
+    """
+    if not artpath:
+        return None
+    return file_uri(artpath)
+
+
+class Thumbnails(object):
+    """
+    Downscaled copies of album art, kept as JPEG files in
+    directory and recreated once the original changes.
+    Needs PIL or Pillow.
+    """
+
+    def __init__(self, directory, size):
+        from PIL import Image as PILImage
+        self.pil = PILImage
+        self.directory = directory
+        self.size = size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, artpath):
+        """
+        Where the thumbnail of artpath is stored
+        """
+        name = hashlib.sha1(bytes(artpath)).hexdigest()
+        return os.path.join(self.directory, '%s-%d.jpg' % (name, self.size))
+
+    def image(self, artpath):
+        """
+        An Image of the thumbnail of artpath, created if it is
+        missing or older than artpath. None if it can not be made.
+        """
+        path = self.path(artpath)
+        try:
+            if (not os.path.exists(path) or
+                    os.path.getmtime(path) < os.path.getmtime(artpath)):
+                self._create(artpath, path)
+            with open(path, 'rb') as f:
+                width, height = self.pil.open(f).size
+        except (IOError, OSError) as e:
+            logger.debug('No thumbnail for %s: %s',
+                         artpath.decode('utf-8', 'replace'), e)
+            return None
+        return Image(uri=image_uri(path), width=width, height=height)
+
+    def _create(self, artpath, path):
+        image = self.pil.open(artpath)
+        image.thumbnail((self.size, self.size))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # written aside and renamed, readers never see half a file
+        image.save(path + '.tmp', 'JPEG')
+        os.rename(path + '.tmp', path)
@@ -0,0 +1,416 @@
+from __future__ import unicode_literals
+
+import array
+import logging
+import time
+
+from .query import ALBUM_COLUMNS, ITEM_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# beets searches these fields when a query has no field prefix
+ITEM_SEARCH_FIELDS = ('artist', 'title', 'comments', 'album', 'albumartist',
+                      'genre')
+ALBUM_SEARCH_FIELDS = ('album', 'albumartist', 'genre')
+
+ITEM_STRINGS = ('title', 'artist', 'albumartist', 'album', 'composer',
+                'genre', 'comments', 'mb_trackid', 'mb_albumid',
+                'mb_artistid', 'mb_albumartistid')
+ITEM_INTEGERS = ('id', 'album_id', 'track', 'disc', 'tracktotal', 'disctotal',
+                 'year', 'month', 'day', 'original_year', 'original_month',
+                 'original_day', 'bitrate')
+ITEM_FLOATS = ('length', 'mtime')
+ITEM_BLOBS = ('path',)
+
+ALBUM_STRINGS = ('album', 'albumartist', 'genre', 'mb_albumid',
+                 'mb_albumartistid')
+ALBUM_INTEGERS = ('id', 'year', 'month', 'day', 'original_year',
+                  'original_month', 'original_day', 'disctotal')
+ALBUM_FLOATS = ()
+ALBUM_BLOBS = ('artpath',)
+
+# stay well below SQLITE_MAX_VARIABLE_NUMBER
+MAX_VARIABLES = 500
+
+
+class Row(dict):
+    """
+    A column snapshot of one beets item or album.
+    Supports the mapping and attribute access beets models offer,
+    so it can stand in for them in the conversion code.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @classmethod
+    def from_sqlite(cls, row):
+        return cls((key, bytes(value) if isinstance(value, buffer) else value)
+                   for key, value in zip(row.keys(), row))
+
+
+class StringPool(object):
+    """
+    Interns strings so every distinct value is stored once.
+    Columns keep the integer id, matching works on the distinct values.
+    """
+
+    def __init__(self):
+        self.values = [None]
+        self.folded = [None]
+        self.ids = {None: 0}
+
+    def __len__(self):
+        return len(self.values)
+
+    def restore(self, values):
+        """
+        Replaces the pool with values, ids are their positions
+        """
+        self.values = [None] + list(values)
+        self.folded = [None] + [value.lower() for value in values]
+        self.ids = dict((value, sid) for sid, value in enumerate(self.values))
+
+    def intern(self, value):
+        try:
+            return self.ids[value]
+        except KeyError:
+            sid = len(self.values)
+            self.values.append(value)
+            self.folded.append(value.lower())
+            self.ids[value] = sid
+            return sid
+
+    def exact(self, value):
+        sid = self.ids.get(value)
+        return set() if sid is None else set([sid])
+
+    def containing(self, needle):
+        needle = needle.lower()
+        return set(sid for sid, folded in enumerate(self.folded)
+                   if folded is not None and needle in folded)
+
+
+class Table(object):
+    """
+    Array backed columns for one beets table.
+    Strings are stored as ids into the shared StringPool.
+    Removed rows stay in place as cleared, dead positions.
+    """
+
+    def __init__(self, pool, strings, integers, floats, blobs):
+        self.pool = pool
+        self.strings = strings
+        self.integers = integers
+        self.floats = floats
+        self.blobs = blobs
+        self.columns = {}
+        for name in strings + integers:
+            self.columns[name] = array.array(str('l'))
+        for name in floats:
+            self.columns[name] = array.array(str('d'))
+        for name in blobs:
+            self.columns[name] = []
+        self.positions = {}
+        self.dead = set()
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def size(self):
+        return len(self.columns['id'])
+
+    def live(self):
+        if not self.dead:
+            return range(self.size)
+        return [pos for pos in xrange(self.size) if pos not in self.dead]
+
+    def to_snapshot(self):
+        return dict((name, column if name in self.blobs
+                     else column.tostring())
+                    for name, column in self.columns.items())
+
+    def restore(self, data):
+        """
+        Replaces the columns with data from to_snapshot(), positions
+        of removed rows are the ones with id 0
+        """
+        for name, column in self.columns.items():
+            if name in self.blobs:
+                self.columns[name] = list(data[name])
+            else:
+                del column[:]
+                column.fromstring(data[name])
+        self.positions = {}
+        self.dead = set()
+        for pos, beets_id in enumerate(self.columns['id']):
+            if beets_id:
+                self.positions[beets_id] = pos
+            else:
+                self.dead.add(pos)
+
+    @property
+    def names(self):
+        return self.strings + self.integers + self.floats + self.blobs
+
+    def append(self, row):
+        self.positions[row[str('id')]] = self.size
+        for name in self.strings:
+            self.columns[name].append(self.pool.intern(row[str(name)]))
+        for name in self.integers:
+            self.columns[name].append(row[str(name)] or 0)
+        for name in self.floats:
+            self.columns[name].append(row[str(name)] or 0.0)
+        for name in self.blobs:
+            value = row[str(name)]
+            self.columns[name].append(bytes(value) if value else None)
+
+    def put(self, row):
+        """
+        Overwrites the row with the same id in place or appends it
+        """
+        pos = self.positions.get(row[str('id')])
+        if pos is None:
+            return self.append(row)
+        for name in self.strings:
+            self.columns[name][pos] = self.pool.intern(row[str(name)])
+        for name in self.integers:
+            self.columns[name][pos] = row[str(name)] or 0
+        for name in self.floats:
+            self.columns[name][pos] = row[str(name)] or 0.0
+        for name in self.blobs:
+            value = row[str(name)]
+            self.columns[name][pos] = bytes(value) if value else None
+
+    def remove(self, beets_id):
+        pos = self.positions.pop(beets_id, None)
+        if pos is None:
+            return
+        self.dead.add(pos)
+        for name in self.strings + self.integers:
+            self.columns[name][pos] = 0
+        for name in self.floats:
+            self.columns[name][pos] = 0.0
+        for name in self.blobs:
+            self.columns[name][pos] = None
+
+    def value(self, name, pos):
+        if name in self.strings:
+            return self.pool.values[self.columns[name][pos]]
+        return self.columns[name][pos]
+
+    def row(self, pos):
+        return Row((name, self.value(name, pos)) for name in self.names)
+
+    def match(self, name, value, exact=False):
+        """
+        Row positions where column name matches value.
+        Strings match case insensitive substrings unless exact is set,
+        numbers always compare equal. Unknown columns match nothing.
+        """
+        if name in self.strings:
+            if exact:
+                sids = self.pool.exact(value)
+            else:
+                sids = self.pool.containing(value)
+            if not sids:
+                return set()
+            return set(pos for pos, sid in enumerate(self.columns[name])
+                       if sid in sids)
+        if name in self.integers or name in self.floats:
+            try:
+                number = int(value)
+            except (TypeError, ValueError):
+                return set()
+            return set(pos for pos, v in enumerate(self.columns[name])
+                       if v == number) - self.dead
+        return set()
+
+    def order(self, positions, names):
+        """
+        positions sorted like the beets default sort on names,
+        strings compare case insensitive.
+        """
+        keys = []
+        for name in names:
+            column = self.columns[name]
+            if name in self.strings:
+                folded = self.pool.folded
+                keys.append(lambda pos, c=column: folded[c[pos]])
+            else:
+                keys.append(lambda pos, c=column: c[pos])
+        return sorted(positions, key=lambda pos: [k(pos) for k in keys])
+
+    def select(self, query, field_map, any_fields=(), exact=False):
+        """
+        Row positions matching every value of every query key.
+        Keys are translated through field_map, 'any' matches if
+        one of any_fields does.
+        """
+        positions = None
+        for key, values in query.iteritems():
+            if key == 'any':
+                fields = any_fields
+            else:
+                fields = (field_map.get(key, key),)
+            for value in values:
+                matched = set()
+                for field in fields:
+                    matched |= self.match(field, value, exact)
+                if positions is None:
+                    positions = matched
+                else:
+                    positions &= matched
+                if not positions:
+                    return []
+        if positions is None:
+            return self.live()
+        return sorted(positions)
+
+
+class LibraryIndex(object):
+    """
+    In-memory copy of the beets items and albums tables
+    that answers search, find and browse without SQLite.
+    """
+
+    ITEM_SEARCH = {'track_name': 'title', 'comment': 'comments',
+                   'track_no': 'track', 'disc_no': 'disc', 'date': 'year'}
+    ALBUM_SEARCH = {'artist': 'albumartist', 'date': 'year'}
+    # beets sort_item and sort_album defaults
+    ITEM_ORDER = ('artist', 'album', 'disc', 'track')
+    ALBUM_ORDER = ('albumartist', 'album')
+
+    def __init__(self):
+        self.pool = StringPool()
+        self.items = Table(self.pool, ITEM_STRINGS, ITEM_INTEGERS,
+                           ITEM_FLOATS, ITEM_BLOBS)
+        self.albums = Table(self.pool, ALBUM_STRINGS, ALBUM_INTEGERS,
+                            ALBUM_FLOATS, ALBUM_BLOBS)
+
+    @classmethod
+    def from_library(cls, lib):
+        start = time.time()
+        index = cls()
+        with lib.transaction() as tx:
+            for row in tx.query('select %s from items order by id'
+                                % ', '.join(index.items.names)):
+                index.items.append(row)
+            for row in tx.query('select %s from albums order by id'
+                                % ', '.join(index.albums.names)):
+                index.albums.append(row)
+        logger.info('Indexed %d items and %d albums (%d strings) in %.2fs',
+                    len(index.items), len(index.albums), len(index.pool),
+                    time.time() - start)
+        return index
+
+    def to_snapshot(self):
+        return {'strings': self.pool.values[1:],
+                'items': self.items.to_snapshot(),
+                'albums': self.albums.to_snapshot()}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        index = cls()
+        index.pool.restore(data['strings'])
+        index.items.restore(data['items'])
+        index.albums.restore(data['albums'])
+        return index
+
+    def reload(self, lib, item_ids, album_ids):
+        """
+        Rereads the given items and albums from lib,
+        ids no longer in the library are removed
+        """
+        for table, source, ids in ((self.items, 'items', item_ids),
+                                   (self.albums, 'albums', album_ids)):
+            ids = list(ids)
+            found = set()
+            with lib.transaction() as tx:
+                for start in range(0, len(ids), MAX_VARIABLES):
+                    chunk = ids[start:start + MAX_VARIABLES]
+                    for row in tx.query(
+                            'select %s from %s where id in (%s)'
+                            % (', '.join(table.names), source,
+                               ', '.join('?' * len(chunk))), chunk):
+                        table.put(row)
+                        found.add(row[str('id')])
+            for beets_id in set(ids) - found:
+                table.remove(beets_id)
+
+    def get_item(self, beets_id):
+        pos = self.items.positions.get(beets_id)
+        return None if pos is None else self.items.row(pos)
+
+    def get_album(self, beets_id):
+        pos = self.albums.positions.get(beets_id)
+        return None if pos is None else self.albums.row(pos)
+
+    def iter_items(self):
+        return (self.items.row(pos) for pos in self.items.live())
+
+    def iter_albums(self):
+        return (self.albums.row(pos) for pos in self.albums.live())
+
+    def search_items(self, query):
+        positions = self.items.select(query, self.ITEM_SEARCH,
+                                      ITEM_SEARCH_FIELDS)
+        return [self.items.row(pos)
+                for pos in self.items.order(positions, self.ITEM_ORDER)]
+
+    def search_albums(self, query):
+        positions = self.albums.select(query, self.ALBUM_SEARCH,
+                                       ALBUM_SEARCH_FIELDS)
+        return [self.albums.row(pos)
+                for pos in self.albums.order(positions, self.ALBUM_ORDER)]
+
+    def find_items(self, query):
+        query = _known(query, ITEM_COLUMNS)
+        return [self.items.row(pos) for pos in self.items.select(
+            query, ITEM_COLUMNS, exact=True)]
+
+    def find_albums(self, query):
+        query = _known(query, ALBUM_COLUMNS)
+        return [self.albums.row(pos) for pos in self.albums.select(
+            query, ALBUM_COLUMNS, exact=True)]
+
+    def album_items(self, album_id):
+        return self.items_in_albums([album_id])
+
+    def items_in_albums(self, album_ids):
+        album_ids = set(album_ids)
+        column = self.items.columns['album_id']
+        return [self.items.row(pos) for pos, album_id in enumerate(column)
+                if album_id in album_ids]
+
+    def genres(self):
+        column = self.albums.columns['genre']
+        values = self.pool.values
+        return [(genre,) for genre in sorted(set(
+            values[column[pos]] for pos in self.albums.live()))]
+
+    def album_artists(self, query=None):
+        positions = self.albums.select(_known(query or {}, ALBUM_COLUMNS),
+                                       ALBUM_COLUMNS, exact=True)
+        names = self.albums.columns['albumartist']
+        mbids = self.albums.columns['mb_albumartistid']
+        values = self.pool.values
+        return sorted(set((values[names[pos]], values[mbids[pos]])
+                          for pos in positions))
+
+    def artist_albums(self, mb_albumartistid, genre):
+        query = {'mb_albumartistid': [mb_albumartistid], 'genre': [genre]}
+        return [self.albums.row(pos) for pos in self.albums.select(
+            query, {}, exact=True)]
+
+
+def _known(query, mapping):
+    """
+    query without the keys mapping does not know
+    """
+    return dict((key, values) for key, values in query.iteritems()
+                if key in mapping)
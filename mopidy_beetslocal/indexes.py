@@ -0,0 +1,87 @@
+from __future__ import unicode_literals
+
+import logging
+
+from .distinct import DISTINCT_COLUMNS, FILTER_COLUMNS
+from .query import (ALBUM_COLUMNS, ALBUM_ORDER, ALBUM_SELECT, ITEM_COLUMNS,
+                    ITEM_ORDER, QueryBuilder, TRACK_SELECT)
+
+logger = logging.getLogger(__name__)
+
+# SQLite keeps an index in the file of its table, so these live in
+# the beets library. The prefix keeps them apart from beets' own.
+INDEXES = [
+    ('beetslocal_items_album_id', 'items', ('album_id',)),
+    ('beetslocal_items_title', 'items', ('title',)),
+    ('beetslocal_items_artist', 'items', ('artist',)),
+    ('beetslocal_items_genre', 'items', ('genre',)),
+    ('beetslocal_items_year', 'items', ('year',)),
+    ('beetslocal_items_mb_trackid', 'items', ('mb_trackid',)),
+    ('beetslocal_items_mb_albumid', 'items', ('mb_albumid',)),
+    ('beetslocal_items_mb_albumartistid', 'items', ('mb_albumartistid',)),
+    # covers the genre and artist browse levels
+    ('beetslocal_albums_genre', 'albums',
+     ('genre', 'albumartist', 'mb_albumartistid')),
+    ('beetslocal_albums_mb_albumartistid', 'albums',
+     ('mb_albumartistid', 'genre')),
+    ('beetslocal_albums_albumartist', 'albums', ('albumartist',)),
+    ('beetslocal_albums_mb_albumid', 'albums', ('mb_albumid',)),
+    ('beetslocal_albums_year', 'albums', ('year',)),
+]
+
+
+def create_indexes(tx):
+    """
+    Creates the missing indexes in a beets transaction
+    """
+    for name, table, columns in INDEXES:
+        tx.mutate('CREATE INDEX IF NOT EXISTS %s ON %s (%s)'
+                  % (name, table, ', '.join(columns)))
+
+
+def drop_indexes(tx):
+    for name, table, columns in INDEXES:
+        tx.mutate('DROP INDEX IF EXISTS %s' % name)
+
+
+def provider_statements():
+    """
+    Name, statement and parameters of the SQL the provider issues
+    for browsing, find and get_distinct, with a typical query each
+    """
+    queries = QueryBuilder()
+    statements = [
+        ('browse root',
+         'select Distinct genre from albums order by genre', []),
+        ('browse genre',) + queries.select(
+            'albumartist, mb_albumartistid', 'albums', {'genre': ['']},
+            ALBUM_COLUMNS, distinct=True, order_by='albumartist'),
+        ('browse artist',) + queries.select(
+            '*', 'albums', {'mb_albumartistid': [''], 'genre': ['']},
+            order_by=ALBUM_ORDER),
+        ('browse album',) + queries.select(
+            '*', 'items', {'album_id': [0]}, order_by=ITEM_ORDER),
+        ('lookup tracks', 'select * from items where id IN (?)', [0]),
+        ('lookup albums', 'select * from items where album_id IN (?)', [0]),
+    ]
+    for key in sorted(ITEM_COLUMNS):
+        statements.append(('find tracks by %s' % key,) + queries.select(
+            TRACK_SELECT, 'items', {key: ['']}, ITEM_COLUMNS))
+    for key in sorted(ALBUM_COLUMNS):
+        statements.append(('find albums by %s' % key,) + queries.select(
+            ALBUM_SELECT, 'albums', {key: ['']}, ALBUM_COLUMNS))
+    for field in sorted(DISTINCT_COLUMNS):
+        statements.append(('distinct %s' % field,) + queries.select(
+            DISTINCT_COLUMNS[field], 'items', {'genre': ['']},
+            FILTER_COLUMNS, distinct=True))
+    return statements
+
+
+def explain(tx):
+    """
+    Yields name, statement and the EXPLAIN QUERY PLAN details
+    of every provider statement
+    """
+    for name, statement, params in provider_statements():
+        plan = tx.query('EXPLAIN QUERY PLAN ' + statement, params)
+        yield name, statement, [row[-1] for row in plan]
@@ -1,20 +1,81 @@
 from __future__ import unicode_literals
 
 import datetime
-import locale
+import functools
+import itertools
 import logging
 import os
 import sqlite3
 import sys
+import threading
+import time
+from collections import defaultdict
 
 from mopidy import backend
 from mopidy.exceptions import ExtensionError
-from mopidy.models import Album, Artist, Ref, SearchResult, Track
+from mopidy.models import Album, Artist, Image, Ref, SearchResult, Track
 
 from uritools import uricompose, urisplit
 
+from . import fts, snapshot
+from .browse import BrowseCache, browse_key
+from .cache import LRUCache
+from .changes import ChangeTracker
+from .convert import RowConverter
+from .deadline import Cancelled, Deadline, checkpoint
+from .distinct import (DISTINCT_COLUMNS, DistinctIndex, FILTER_COLUMNS,
+                       distinct_value)
+from .images import Thumbnails, image_uri
+from .index import LibraryIndex, MAX_VARIABLES, Row
+from .indexes import create_indexes
+from .metrics import Metrics, metered
+from .pool import ConnectionPool
+from .query import (ALBUM_COLUMNS, ALBUM_ORDER, ALBUM_SELECT, ITEM_COLUMNS,
+                    ITEM_ORDER, QueryBuilder, TRACK_SELECT)
+from .uri import album_uri, artist_uri, track_uri
+
 logger = logging.getLogger(__name__)
 
+# rows read per query when streaming a whole table
+PAGE_SIZE = 1000
+# seconds between checks whether the library file was written to
+VERSION_CHECK_INTERVAL = 1.0
+# item paths remembered for playback
+PATH_CACHE_SIZE = 10000
+
+
+class IdQuery(object):
+    """
+    A beets query for rows whose field is one of ids,
+    answered with a single IN clause
+    """
+
+    def __init__(self, field, ids):
+        self.field = field
+        self.ids = list(ids)
+
+    def clause(self):
+        return ('%s IN (%s)' % (self.field, ', '.join('?' * len(self.ids))),
+                self.ids)
+
+    def match(self, item):
+        return item[self.field] in self.ids
+
+
+def opened(func):
+    """
+    Makes the decorated provider method wait for the library
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        self.wait_opened()
+        return func(self, *args, **kwargs)
+    return wrapper
+
+
+def _ms_since(start):
+    return int((time.time() - start) * 1000)
+
 
 class BeetsLocalLibraryProvider(backend.LibraryProvider):
     ROOT_URI = 'beetslocal:root'
@@ -22,13 +83,79 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
 
     def __init__(self, *args, **kwargs):
         super(BeetsLocalLibraryProvider, self).__init__(*args, **kwargs)
+        start = time.time()
+        if not os.path.isfile(self.backend.beetslibrary):
+            raise ExtensionError('Can not find %s'
+                                 % (self.backend.beetslibrary))
+        self.lib = None
+        self.metrics = Metrics()
+        self.queries = QueryBuilder()
+        self.pool = None
+        self.changes = ChangeTracker()
+        self.index = None
+        self.distinct = None
+        self.fts = None
+        self.browse_cache = None
+        self.image_cache = {}
+        self.path_cache = LRUCache(PATH_CACHE_SIZE)
+        self.thumbnails = None
+        self.model_cache = None
+        if self.backend.model_cache_size:
+            self.model_cache = LRUCache(self.backend.model_cache_size)
+        self._library_version = None
+        self._version_checked = 0
+        self.startup = {}
+        self.metrics.add_source('model_cache', self.cache_stats)
+        self.metrics.add_source('path_cache', self.path_cache.stats)
+        self.metrics.add_source('queries', self._query_stats)
+        self.metrics.add_source('startup', lambda: self.startup)
+        self._opened = threading.Event()
+        self._open_error = None
+        # beets is imported and the library opened off the mopidy
+        # startup path, requests wait until that is done
+        warm_up = threading.Thread(target=self._warm_up,
+                                   args=(start,), name='BeetsLocalWarmUp')
+        warm_up.daemon = True
+        warm_up.start()
+        self.startup['constructor_ms'] = _ms_since(start)
+
+    def _warm_up(self, start):
+        try:
+            self._open()
+        except Exception as e:
+            logger.error('BeetsLocalBackend: can not open %s: %s',
+                         self.backend.beetslibrary, e)
+            self._open_error = e
+        finally:
+            self.startup['ready_ms'] = _ms_since(start)
+            self._opened.set()
+        logger.info('BeetsLocalBackend: library ready %(ready_ms)d ms '
+                    'after start, %(constructor_ms)d ms of it blocking '
+                    'mopidy (beets import %(import_ms)d ms, open '
+                    '%(open_ms)d ms, indexes %(index_ms)d ms)',
+                    dict(dict.fromkeys(('import_ms', 'open_ms', 'index_ms'),
+                                       0), **self.startup))
+
+    def wait_opened(self):
+        """
+        Blocks until the library is open, raises the error
+        opening it failed with
+        """
+        self._opened.wait()
+        if self._open_error is not None:
+            raise ExtensionError('Mopidy-BeetsLocal can not open %s: %s'
+                                 % (self.backend.beetslibrary,
+                                    self._open_error))
+
+    def _open(self):
+        start = time.time()
         try:
             import beets.library
         except:
             logger.error('BeetsLocalBackend: could not import beets library')
-        if not os.path.isfile(self.backend.beetslibrary):
-            raise ExtensionError('Can not find %s'
-                                 % (self.backend.beetslibrary))
+            raise
+        self.startup['import_ms'] = _ms_since(start)
+        start = time.time()
         try:
             self.lib = beets.library.Library(self.backend.beetslibrary)
         except sqlite3.OperationalError, e:
@@ -42,19 +169,149 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
         except:
             print "Unexpected error:", sys.exc_info()[0]
             pass
+        if self.backend.create_indexes:
+            with self.lib.transaction() as tx:
+                create_indexes(tx)
+        if self.backend.connection_pool_size:
+            self.pool = ConnectionPool(self.backend.beetslibrary,
+                                       self.backend.connection_pool_size)
+        self.startup['open_ms'] = _ms_since(start)
+        start = time.time()
+        restored = self.backend.snapshot and self._restore_snapshot()
+        if not restored:
+            self.changes.scan(self.lib)
+            if self.backend.in_memory_index:
+                self.index = LibraryIndex.from_library(self.lib)
+            if self.backend.distinct_index:
+                self.distinct = DistinctIndex.from_library(self.lib)
+        if self.backend.fts_index:
+            self.fts = self._open_fts()
+        if self.backend.browse_cache:
+            self.browse_cache = BrowseCache()
+            self.browse_cache.track(self._query_beets_db(
+                'select id, genre, mb_albumartistid from albums'))
+        if self.backend.thumbnail_size:
+            self.thumbnails = self._open_thumbnails()
+        if self.backend.snapshot and not restored:
+            self._save_snapshot()
+        self.startup['index_ms'] = _ms_since(start)
+
+    @opened
+    @metered('refresh')
+    def refresh(self, uri=None):
+        """
+        Applies items and albums added, modified or removed since
+        the last refresh to the index, full text index and caches
+        """
+        start = time.time()
+        changes = self.changes.scan(self.lib)
+        if not (changes.items or changes.albums):
+            return
+        self._apply_changes(changes)
+        if self.fts is not None:
+            self.fts.sync()
+        if self.browse_cache is not None:
+            self.browse_cache.invalidate(changes.albums, self._select_ids(
+                'id, genre, mb_albumartistid', 'albums', changes.albums))
+        self.image_cache.clear()
+        if self.model_cache is not None:
+            for beets_id in changes.items:
+                self.model_cache.discard(('track', beets_id))
+            for beets_id in changes.albums:
+                self.model_cache.discard(('album', beets_id))
+        logger.info('Refreshed %d items and %d albums in %.2fs',
+                    len(changes.items), len(changes.albums),
+                    time.time() - start)
+
+    def _apply_changes(self, changes):
+        """
+        Brings the indexes and the path cache up to date with changes
+        """
+        if self.index is not None:
+            self.index.reload(self.lib, changes.items, changes.albums)
+        if self.distinct is not None:
+            self.distinct.reload(self.lib, changes.items)
+        for beets_id in changes.items:
+            self.path_cache.discard(beets_id)
+
+    def _snapshot_parts(self):
+        parts = ['changes', 'paths']
+        if self.backend.in_memory_index:
+            parts.append('index')
+        if self.backend.distinct_index:
+            parts.append('distinct')
+        return parts
+
+    def _restore_snapshot(self):
+        """
+        Restores change tracker, indexes and paths from the snapshot
+        and applies what changed in the library since it was written
+        """
+        state = snapshot.read(self.backend.beetslibrary + '.snapshot',
+                              self.backend.beetslibrary,
+                              self._snapshot_parts())
+        if state is None:
+            return False
+        self.changes = ChangeTracker.from_snapshot(state['changes'])
+        if self.backend.in_memory_index:
+            self.index = LibraryIndex.from_snapshot(state['index'])
+        if self.backend.distinct_index:
+            self.distinct = DistinctIndex.from_snapshot(state['distinct'])
+        for beets_id, path in state['paths']:
+            self.path_cache.put(beets_id, path)
+        if self.changes.changed(self.lib):
+            changes = self.changes.scan(self.lib)
+            self._apply_changes(changes)
+            logger.info('Applied %d items and %d albums changed since '
+                        'the snapshot', len(changes.items),
+                        len(changes.albums))
+        return True
+
+    @opened
+    def save_snapshot(self):
+        self._save_snapshot()
+
+    def _save_snapshot(self):
+        """
+        Writes the change tracker, indexes and cached paths to
+        <beetslibrary>.snapshot for the next start
+        """
+        state = {'changes': self.changes.to_snapshot(),
+                 'paths': self.path_cache.items()}
+        if self.index is not None:
+            state['index'] = self.index.to_snapshot()
+        if self.distinct is not None:
+            state['distinct'] = self.distinct.to_snapshot()
+        try:
+            snapshot.write(self.backend.beetslibrary + '.snapshot',
+                           self.backend.beetslibrary, state)
+        except (IOError, OSError, ValueError) as e:
+            logger.warning('BeetsLocalBackend: can not write snapshot: %s',
+                           e)
+
+    def _open_fts(self):
+        path = self.backend.beetslibrary + '.fts'
+        try:
+            index = fts.FullTextIndex(path, self.backend.beetslibrary)
+            index.sync()
+        except sqlite3.OperationalError as e:
+            logger.warning('BeetsLocalBackend: full text index %s '
+                           'not available: %s', path, e)
+            return None
+        return index
 
     def _find_exact(self, query=None, uris=None):
-        logger.debug("Find query: %s in uris: %s" % (query, uris))
+        logger.debug("Find query: %s in uris: %s", query, uris)
         # artists = []
         albums = []
         if not (('track_name' in query) or ('composer' in query)):
             # when trackname or composer is queried dont search for albums
             albums = self._find_albums(query)
-            logger.debug("Find found %s albums" % len(albums))
+            logger.debug("Find found %s albums", len(albums))
         #    artists=self._find_artists(query)
         #    logger.debug("Find found %s artists" % len(artists))
         tracks = self._find_tracks(query)
-        logger.debug(u'Find found %s tracks' % len(tracks))
+        logger.debug(u'Find found %s tracks', len(tracks))
         return SearchResult(
             uri=uricompose('beetslocal',
                            None,
@@ -64,48 +321,128 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
             albums=albums,
             tracks=tracks)
 
+    @opened
+    @metered('search')
     def search(self, query=None, uris=None, exact=False):
-        logger.debug(u'Search query: %s in uris: %s' % (query, uris))
+        """
+        Searches within query_timeout, an empty result once it passed
+        """
+        try:
+            with self._deadline().running():
+                return self._search(query, uris, exact)
+        except Cancelled:
+            logger.warning(u'Search %s cancelled after %d ms',
+                           query, self.backend.query_timeout)
+            return SearchResult(uri='beetslocal:search')
+
+    def _deadline(self):
+        return Deadline(self.backend.query_timeout / 1000.0)
+
+    def _search(self, query=None, uris=None, exact=False):
+        logger.debug(u'Search query: %s in uris: %s', query, uris)
         # import pdb; pdb.set_trace()
         query = self._sanitize_query(query)
-        logger.debug(u'Search sanitized query: %s ' % query)
+        logger.debug(u'Search sanitized query: %s ', query)
         if exact:
             return self._find_exact(query, uris)
-        albums = []
         if not query:
-            uri = 'beetslocal:search-all'
-            tracks = self.lib.items()
-            albums = self.lib.albums()
+            return self._search_all()
+        albums = []
+        uri = uricompose('beetslocal',
+                         None,
+                         'search',
+                         query)
+        if self.fts is not None and fts.covers(query, fts.ITEM_KEYS):
+            item_ids = self.fts.search_items(query)
+            tracks = self._in_order(self._get_items('id', item_ids),
+                                    item_ids)
+            if 'track_name' not in query:
+                album_ids = self.fts.search_albums(query) or []
+                albums = self._in_order(self._get_albums(album_ids),
+                                        album_ids)
+        elif self.index is not None:
+            tracks = self.index.search_items(query)
+            if 'track_name' not in query:
+                albums = self.index.search_albums(query)
         else:
-            uri = uricompose('beetslocal',
-                             None,
-                             'search',
-                             query)
             track_query = self._build_beets_track_query(query)
-            logger.debug(u'Build Query "%s":' % track_query)
+            logger.debug(u'Build Query "%s":', track_query)
+            start = time.time()
             tracks = self.lib.items(track_query)
+            self.metrics.statement('beets items query',
+                                   (time.time() - start) * 1000, len(tracks))
             if 'track_name' not in query:
                 # when trackname queried dont search for albums
                 album_query = self._build_beets_album_query(query)
-                logger.debug('Build Query "%s":' % album_query)
+                logger.debug('Build Query "%s":', album_query)
+                start = time.time()
                 albums = self.lib.albums(album_query)
-        logger.debug(u"Query found %s tracks and %s albums"
-                     % (len(tracks), len(albums)))
+                self.metrics.statement('beets albums query',
+                                       (time.time() - start) * 1000,
+                                       len(albums))
+        logger.debug(u"Query found %s tracks and %s albums",
+                     len(tracks), len(albums))
+        with self.metrics.method('convert'):
+            return SearchResult(
+                uri=uri,
+                tracks=[self._convert_item(track) for track in tracks],
+                albums=[self._convert_album(album) for album in albums]
+            )
+
+    def _search_all(self):
+        """
+        Every track and album, at most search_all_limit of each.
+        Rows are read and converted page by page, so no more
+        than the result is held in memory.
+        """
+        limit = self.backend.search_all_limit or None
+        if self.index is not None:
+            tracks = itertools.islice(self.index.iter_items(), limit)
+            albums = itertools.islice(self.index.iter_albums(), limit)
+        else:
+            tracks = itertools.islice(self._iter_table('items'), limit)
+            albums = itertools.islice(self._iter_table('albums'), limit)
         return SearchResult(
-            uri=uri,
+            uri='beetslocal:search-all',
             tracks=[self._convert_item(track) for track in tracks],
             albums=[self._convert_album(album) for album in albums]
         )
 
+    def _iter_table(self, table):
+        """
+        Yields all rows of table in id order, PAGE_SIZE rows per query
+        """
+        last_id = 0
+        while True:
+            rows = self._query_beets_db(
+                'select * from %s where id > ? order by id limit ?' % table,
+                (last_id, PAGE_SIZE))
+            for row in rows:
+                yield Row.from_sqlite(row)
+            if len(rows) < PAGE_SIZE:
+                return
+            last_id = rows[-1][str('id')]
+
+    @opened
+    @metered('browse')
     def browse(self, uri):
-        logger.debug(u"Browse being called for %s" % uri)
+        logger.debug(u"Browse being called for %s", uri)
         level = urisplit(uri).path
         query = self._sanitize_query(dict(urisplit(uri).getquerylist()))
-        logger.debug("Got parsed to level: %s - query: %s" % (level,
-                                                              query))
+        logger.debug("Got parsed to level: %s - query: %s", level, query)
+        if self.browse_cache is None:
+            return self._browse(uri, level, query)
+        key = browse_key(level, query)
+        result = self.browse_cache.get(key)
+        if result is None:
+            result = self._browse(uri, level, query)
+            self.browse_cache.put(key, result)
+        return result
+
+    def _browse(self, uri, level, query):
         result = []
         if not level:
-            logger.error("No level for uri %s" % uri)
+            logger.error("No level for uri %s", uri)
             # import pdb; pdb.set_trace()
         if level == 'root':
             for row in self._browse_genre():
@@ -135,102 +472,258 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
                     name=album.album))
         elif level == "album":
             for track in self._browse_track(query):
-                result.append(Ref.track(
-                    uri="beetslocal:track:%s:%s" % (track.id,
-                                                    track.path.decode('utf8')),
-                    name=track.title))
+                result.append(Ref.track(uri=track_uri(track.id),
+                                        name=track.title))
         else:
             logger.debug('Unknown URI: %s', uri)
         # logger.debug(result)
         return result
 
+    @opened
+    @metered('lookup')
     def lookup(self, uri):
-        logger.debug("looking up uri = %s of type %s" % (
-            uri.encode('ascii', 'ignore'), type(uri).__name__))
-        uri_dict = self.backend._extract_uri(uri)
-        item_type = uri_dict['item_type']
-        beets_id = uri_dict['beets_id']
-        logger.debug('item_type: "%s", beets_id: "%s"' % (item_type, beets_id))
-        if item_type == 'track':
+        logger.debug("looking up uri = %r of type %s",
+                     uri, type(uri).__name__)
+        return self.lookup_many([uri])[uri]
+
+    @opened
+    @metered('lookup_many')
+    def lookup_many(self, uris):
+        """
+        Looks up all uris with one query per table instead of
+        one per uri. Returns a dict of uri to list of tracks.
+        """
+        result = dict((uri, []) for uri in uris)
+        track_uris = defaultdict(list)
+        album_uris = defaultdict(list)
+        for uri in result:
             try:
-                track = self._get_track(beets_id)
-                logger.debug('Beets track for id "%s": %s' %
-                             (beets_id, uri.encode('ascii', 'ignore')))
-                return [track]
-            except Exception as error:
-                logger.debug(u'Failed to lookup "%s": %s' % (uri, error))
-                return []
-        elif item_type == 'album':
+                uri_dict = self.backend._extract_uri(uri)
+            except (ValueError, IndexError) as error:
+                logger.debug(u'Failed to lookup "%s": %s', uri, error)
+                continue
+            if uri_dict['item_type'] == 'track':
+                track_uris[uri_dict['beets_id']].append(uri)
+            elif uri_dict['item_type'] == 'album':
+                album_uris[uri_dict['beets_id']].append(uri)
+            else:
+                logger.debug(u"Dont know what to do with item_type: %s",
+                             uri_dict['item_type'])
+        for item in self._get_items('id', track_uris.keys()):
+            track = self._convert_item(item)
+            for uri in track_uris[item['id']]:
+                result[uri].append(track)
+        for item in self._get_items('album_id', album_uris.keys()):
+            track = self._convert_item(item)
+            for uri in album_uris[item['album_id']]:
+                result[uri].append(track)
+        return result
+
+    @opened
+    @metered('get_images')
+    def get_images(self, uris):
+        """
+        The album art of every track and album uri, resolved with
+        one query per table for the uris not seen before
+        """
+        result = {}
+        track_uris = defaultdict(list)
+        album_uris = defaultdict(list)
+        for uri in uris:
+            if uri in self.image_cache:
+                result[uri] = self.image_cache[uri]
+                continue
+            result[uri] = []
             try:
-                tracks = self._get_album(beets_id)
-                return tracks
-            except Exception as error:
-                logger.debug(u'Failed to lookup "%s": %s' % (uri, error))
-                return []
-        else:
-            logger.debug(u"Dont know what to do with item_type: %s" %
-                         item_type)
+                uri_dict = self.backend._extract_uri(uri)
+            except (ValueError, IndexError) as error:
+                logger.debug(u'Failed to get images of "%s": %s',
+                             uri, error)
+                continue
+            if uri_dict['item_type'] == 'track':
+                track_uris[uri_dict['beets_id']].append(uri)
+            elif uri_dict['item_type'] == 'album':
+                album_uris[uri_dict['beets_id']].append(uri)
+        for row in self._select_ids('id, album_id', 'items', track_uris):
+            album_uris[row[1]].extend(track_uris[row[0]])
+        for row in self._select_ids('id, artpath', 'albums', album_uris):
+            images = self._album_images(row[1])
+            for uri in album_uris[row[0]]:
+                result[uri] = images
+        for uri in itertools.chain(*album_uris.values()):
+            self.image_cache[uri] = result[uri]
+        return result
+
+    def _album_images(self, artpath):
+        if not artpath:
             return []
+        artpath = bytes(artpath)
+        images = [Image(uri=image_uri(artpath))]
+        if self.thumbnails is not None:
+            thumbnail = self.thumbnails.image(artpath)
+            if thumbnail is not None:
+                images.append(thumbnail)
+        return images
+
+    def _open_thumbnails(self):
+        directory = self.backend.beetslibrary + '.thumbnails'
+        try:
+            return Thumbnails(directory, self.backend.thumbnail_size)
+        except ImportError:
+            logger.warning('BeetsLocalBackend: thumbnails need PIL '
+                           'or Pillow, which is not installed')
+        except OSError as e:
+            logger.warning('BeetsLocalBackend: can not create %s: %s',
+                           directory, e)
+        return None
+
+    @opened
+    @metered('get_path')
+    def get_path(self, beets_id):
+        """
+        Filesystem path of the item with beets_id, None if there
+        is no such item
+        """
+        path = self.path_cache.get(beets_id)
+        if path is None:
+            if self.index is not None:
+                item = self.index.get_item(beets_id)
+                path = item and item['path']
+            else:
+                rows = self._query_beets_db(
+                    'select path from items where id = ?', [beets_id])
+                path = rows and rows[0][0] and bytes(rows[0][0])
+            if not path:
+                return None
+            self.path_cache.put(beets_id, path)
+        return path
+
+    def _get_items(self, field, ids):
+        """
+        Items whose field is one of ids, fetched in batches
+        """
+        ids = list(ids)
+        if self.index is not None:
+            if field == 'id':
+                return filter(None, map(self.index.get_item, ids))
+            return self.index.items_in_albums(ids)
+        items = []
+        for start in range(0, len(ids), MAX_VARIABLES):
+            items.extend(self.lib.items(
+                IdQuery(field, ids[start:start + MAX_VARIABLES])))
+        return items
+
+    def _get_albums(self, ids):
+        """
+        Albums with one of ids, fetched in batches
+        """
+        ids = list(ids)
+        if self.index is not None:
+            return filter(None, map(self.index.get_album, ids))
+        albums = []
+        for start in range(0, len(ids), MAX_VARIABLES):
+            albums.extend(self.lib.albums(
+                IdQuery('id', ids[start:start + MAX_VARIABLES])))
+        return albums
+
+    def _select_ids(self, columns, table, ids):
+        """
+        columns of the rows of table with one of ids, in batches
+        """
+        ids = list(ids)
+        rows = []
+        for start in range(0, len(ids), MAX_VARIABLES):
+            chunk = ids[start:start + MAX_VARIABLES]
+            rows.extend(self._query_beets_db(
+                'select %s from %s where id in (%s)'
+                % (columns, table, ', '.join('?' * len(chunk))), chunk))
+        return rows
+
+    def _in_order(self, rows, ids):
+        """
+        rows sorted by the position of their id in ids
+        """
+        by_id = dict((row['id'], row) for row in rows)
+        return [by_id[beets_id] for beets_id in ids if beets_id in by_id]
 
+    @opened
+    @metered('get_distinct')
     def get_distinct(self, field, query=None):
-        logger.warn(u'get_distinct called field: %s, Query: %s' % (field,
-                                                                   query))
+        try:
+            with self._deadline().running():
+                return self._get_distinct(field, query)
+        except Cancelled:
+            logger.warning(u'get_distinct %s %s cancelled after %d ms',
+                           field, query, self.backend.query_timeout)
+            return set()
+
+    def _get_distinct(self, field, query=None):
+        logger.debug(u'get_distinct called field: %s, Query: %s',
+                     field, query)
         query = self._sanitize_query(query)
-        logger.debug(u'Search sanitized query: %s ' % query)
-        result = []
-        if field == 'artist':
-            result = self._browse_artist(query)
-        elif field == 'genre':
-            result = self._browse_genre()
-        else:
-            logger.info(u'get_distinct not fully implemented yet')
-            result = []
-        return set([v[0] for v in result])
-
-    def _get_track(self, beets_id):
-        track = self.lib.get_item(beets_id)
-        return self._convert_item(track)
-
-    def _get_album(self, beets_id):
-        album = self.lib.get_album(beets_id)
-        return [self._convert_item(item) for item in album.items()]
+        logger.debug(u'Search sanitized query: %s ', query)
+        if field not in DISTINCT_COLUMNS:
+            logger.info(u'get_distinct: %s is not supported', field)
+            return set()
+        if self.distinct is not None:
+            return self.distinct.distinct(field, query)
+        statement, params = self.queries.select(
+            DISTINCT_COLUMNS[field], 'items', query, FILTER_COLUMNS,
+            distinct=True)
+        result = set(distinct_value(field, row[0])
+                     for row in self._query_beets_db(statement, params))
+        result.discard(None)
+        return result
 
     def _browse_track(self, query):
-        return self.lib.items('album_id:\'%s\'' % query['album'][0])
+        if self.index is not None:
+            return self.index.album_items(int(query['album'][0]))
+        return self._select_rows('*', 'items',
+                                 {'album_id': query['album']},
+                                 order_by=ITEM_ORDER)
 
     def _browse_album(self, query):
-        logger.debug(u'browse_album query: %s' % query)
-        return self.lib.albums('mb_albumartistid:\'%s\' genre:\'%s\''
-                               % (query['artist'][0], query['genre'][0]))
+        logger.debug(u'browse_album query: %s', query)
+        if self.index is not None:
+            return self.index.artist_albums(query['artist'][0],
+                                            query['genre'][0])
+        return self._select_rows('*', 'albums',
+                                 {'mb_albumartistid': query['artist'],
+                                  'genre': query['genre']},
+                                 order_by=ALBUM_ORDER)
 
     def _browse_artist(self, query=None):
-        statement = 'select Distinct albumartist, mb_albumartistid from albums'
-        if query:
-            statement += ' where 1=1 '
-            statement += self._build_statement(query, 'genre', 'genre')
-            statement += self._build_statement(query, 'artist', 'albumartist')
-            statement += self._build_statement(query, 'album', 'album')
-            statement += self._build_statement(query, 'mb_albumid',
-                                                      'mb_albumid')
-            statement += self._build_statement(query, 'date', 'year')
-        statement += ' order by albumartist'
-        logger.debug('browse_artist: %s' % statement)
-        return self._query_beets_db(statement)
+        if self.index is not None:
+            return self.index.album_artists(query)
+        statement, params = self.queries.select(
+            'albumartist, mb_albumartistid', 'albums', query, ALBUM_COLUMNS,
+            distinct=True, order_by='albumartist')
+        logger.debug('browse_artist: %s', statement)
+        return self._query_beets_db(statement, params)
 
     def _browse_genre(self):
+        if self.index is not None:
+            return self.index.genres()
         return self._query_beets_db('select Distinct genre '
                                     'from albums order by genre')
 
-    def _query_beets_db(self, statement):
+    def _query_beets_db(self, statement, subvals=()):
         result = []
         logger.debug(statement)
-        with self.lib.transaction() as tx:
-            try:
-                result = tx.query(statement)
-            except:
-                # import pdb; pdb.set_trace()
-                logger.error('Statement failed: %s' % statement)
-                pass
+        start = time.time()
+        try:
+            if self.pool is not None:
+                result = self.pool.query(statement, subvals)
+            else:
+                with self.lib.transaction() as tx:
+                    result = tx.query(statement, subvals)
+            self.metrics.statement(statement, (time.time() - start) * 1000,
+                                   len(result))
+        except:
+            # interrupted by the progress handler
+            checkpoint()
+            logger.error('Statement failed: %s', statement)
+            pass
         return result
 
     def _sanitize_query(self, query):
@@ -272,131 +765,46 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
                 year = None
         return year
 
-    def _build_statement(self, query, query_key, beets_key):
+    def _select_rows(self, columns, table, query, mapping=None,
+                     order_by=None):
         """
-        A proper mopidy query has a Array of values
-        Queries from mpd and browse requests hav strings
+        Rows of table matching query exactly, as Row objects
         """
-        statement = ""
-        if query_key in query:
-            for query_string in query[query_key]:
-                if '"' in query_string:
-                    statement += " and %s = \'%s\' " % (beets_key,
-                                                        query_string)
-                else:
-                    statement += ' and %s = \"%s\" ' % (beets_key,
-                                                        query_string)
-        return statement
+        statement, params = self.queries.select(columns, table, query,
+                                                mapping, order_by=order_by)
+        return [Row.from_sqlite(row)
+                for row in self._query_beets_db(statement, params)]
 
     def _find_tracks(self, query):
-        statement = ('select id, title, day, month, year, artist, album, '
-                     'composer, track, disc, length,  bitrate, comments, '
-                     'mb_trackid, mtime, genre, tracktotal, disctotal, '
-                     'mb_albumid, mb_albumartistid, albumartist, mb_artistid '
-                     'from items where 1=1 ')
-        statement += self._build_statement(query, 'track_name', 'title')
-        statement += self._build_statement(query, 'genre', 'genre')
-        statement += self._build_statement(query, 'artist', 'artist')
-        statement += self._build_statement(query, 'album', 'album')
-        statement += self._build_statement(query, 'composer', 'composer')
-        statement += self._build_statement(query, 'mb_trackid', 'mb_trackid')
-        statement += self._build_statement(query, 'mb_albumid', 'mb_albumid')
-        statement += self._build_statement(query,
-                                           'mb_albumartistid',
-                                           'mb_albumartistid')
-        statement += self._build_statement(query, 'date', 'year')
-        tracks = []
-        result = self._query_beets_db(statement)
-        for row in result:
-            try:
-                d = datetime.datetime(
-                    row[4],
-                    row[3],
-                    row[2])
-                date = '{:%Y-%m-%d}'.format(d)
-            except:
-                date = None
-            artist = Artist(name=row[5],
-                            musicbrainz_id=row[21],
-                            uri="beetslocal:artist:%s:" % row[21])
-            albumartist = Artist(name=row[20],
-                                 musicbrainz_id=row[19],
-                                 uri="beetslocal:artist:%s:" % row[19])
-            composer = Artist(name=row[7],
-                              musicbrainz_id='',
-                              uri="beetslocal:composer:%s:" % row[7])
-            album = Album(name=row[6],
-                          date=date,
-                          artists=[albumartist],
-                          num_tracks=row[16],
-                          num_discs=row[17],
-                          musicbrainz_id=row[18],
-                          uri="beetslocal:mb_album:%s:" % row[18])
-            tracks.append(Track(name=row[1],
-                                artists=[artist],
-                                album=album,
-                                composers=[composer],
-                                track_no=row[8],
-                                disc_no=row[9],
-                                date=row[4],
-                                length=row[10] * 1000,
-                                bitrate=row[11],
-                                comment=row[12],
-                                musicbrainz_id=row[13],
-                                last_modified=int(row[14] * 1000),
-                                genre=row[15],
-                                uri="beetslocal:track:%s:" % row[0]))
-        return tracks
+        if self.index is not None:
+            return [self._convert_item(item)
+                    for item in self.index.find_items(query)]
+        statement, params = self.queries.select(
+            TRACK_SELECT, 'items', query, ITEM_COLUMNS)
+        rows = self._query_beets_db(statement, params)
+        with self.metrics.method('convert'):
+            return RowConverter().tracks(rows)
 
     def _find_albums(self, query):
-        statement = ('select id, album, day, month, year, '
-                     'albumartist, disctotal, '
-                     'mb_albumid, artpath, mb_albumartistid '
-                     'from albums where 1=1 ')
-        statement += self._build_statement(query, 'genre', 'genre')
-        statement += self._build_statement(query, 'artist', 'albumartist')
-        statement += self._build_statement(query, 'album', 'album')
-        statement += self._build_statement(query, 'mb_albumid', 'mb_albumid')
-        statement += self._build_statement(query, 'date', 'year')
-        result = self._query_beets_db(statement)
-        albums = []
-        for row in result:
-            try:
-                d = datetime.datetime(
-                    row[4],
-                    row[3],
-                    row[2])
-                date = '{:%Y-%m-%d}'.format(d)
-            except:
-                date = None
-            artist = Artist(name=row[5],
-                            musicbrainz_id=row[9],
-                            uri="beetslocal:artist:%s:" % row[9])
-            albums.append(Album(name=row[1],
-                                date=date,
-                                artists=[artist],
-                                # num_tracks=row[6],
-                                num_discs=row[6],
-                                musicbrainz_id=row[7],
-                                images=[row[8]],
-                                uri="beetslocal:album:%s:" % row[0]))
-        return albums
+        if self.index is not None:
+            return [self._convert_album(album)
+                    for album in self.index.find_albums(query)]
+        statement, params = self.queries.select(
+            ALBUM_SELECT, 'albums', query, ALBUM_COLUMNS)
+        rows = self._query_beets_db(statement, params)
+        with self.metrics.method('convert'):
+            return RowConverter().albums(rows)
 
     def _find_artists(self, query):
-        statement = ('select Distinct albumartist, mb_albumartistid'
-                     ' from albums where 1=1 ')
-        statement += self._build_statement(query, 'genre', 'genre')
-        statement += self._build_statement(query, 'artist', 'albumartist')
-        statement += self._build_statement(query, 'date', 'year')
-        statement += self._build_statement(query,
-                                           'mb_albumartistid',
-                                           'mb_albumartistid')
+        statement, params = self.queries.select(
+            'albumartist, mb_albumartistid', 'albums', query, ALBUM_COLUMNS,
+            distinct=True)
         artists = []
-        result = self._query_beets_db(statement)
+        result = self._query_beets_db(statement, params)
         for row in result:
             artists.append(Artist(name=row[0],
                                   musicbrainz_id=row[1],
-                                  uri="beetslocal:artist:%s:" % row[1]))
+                                  uri=artist_uri('artist', row[1])))
         return artists
 
     def _build_beets_track_query(self, query):
@@ -413,7 +821,7 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
                     beets_query += key
             # beets_query += "::(" + "|".join(query[key]) + ") "
             beets_query += ":" + " ".join(query[key]) + " "
-            logger.info(beets_query)
+            logger.debug(beets_query)
         # return json.dumps(self._decode_path(beets_query).strip())
         return '\'%s\'' % beets_query.strip()
 
@@ -430,34 +838,63 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
                 else:
                     beets_query += key
             beets_query += ":" + " ".join(query[key]) + " "
-            logger.info(beets_query)
+            logger.debug(beets_query)
         return '\'%s\'' % beets_query.strip()
 
-    def _decode_path(self, path):
-        default_encoding = locale.getpreferredencoding()
-        decoded_path = None
-        try:
-            decoded_path = path.decode(default_encoding)
-        except:
-            pass
-        if not decoded_path:
-            try:
-                decoded_path = path.decode('utf-8')
-            except:
-                pass
-        if not decoded_path:
-            try:
-                decoded_path = path.decode('ISO-8859-1')
-            except:
-                pass
-        return decoded_path
+    def _query_stats(self):
+        stats = {'shapes': len(self.queries), 'hits': self.queries.hits,
+                 'misses': self.queries.misses}
+        if self.browse_cache is not None:
+            stats['browse_cache'] = len(self.browse_cache)
+        if self.image_cache:
+            stats['image_cache'] = len(self.image_cache)
+        return stats
+
+    def cache_stats(self):
+        """
+        Hit and miss counters of the model cache
+        """
+        if self.model_cache is None:
+            return {}
+        return self.model_cache.stats()
+
+    def _validate_model_cache(self):
+        """
+        Empties the model cache once another connection
+        has written to the library
+        """
+        now = time.time()
+        if now - self._version_checked < VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked = now
+        # data_version is per connection, so always ask the beets one
+        with self.lib.transaction() as tx:
+            version = tx.query('PRAGMA data_version')[0][0]
+        if version != self._library_version:
+            if self._library_version is not None:
+                logger.debug('Library changed, clearing model cache')
+                self.model_cache.clear()
+            self._library_version = version
 
     def _convert_item(self, item):
         """
-        Transforms a beets item into a mopidy Track
+        Transforms a beets item into a mopidy Track,
+        reusing a cached Track while the item mtime is unchanged
         """
         if not item:
             return
+        checkpoint()
+        if self.model_cache is None:
+            return self._build_track(item)
+        self._validate_model_cache()
+        key = ('track', item['id'])
+        track = self.model_cache.get(key, item['mtime'])
+        if track is None:
+            track = self._build_track(item)
+            self.model_cache.put(key, track, item['mtime'])
+        return track
+
+    def _build_track(self, item):
         track_kwargs = {}
         album_kwargs = {}
         artist_kwargs = {}
@@ -532,10 +969,10 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
             albumartist_kwargs['musicbrainz_id'] = (
                 item['mb_albumartistid'])
 
-        if 'path' in item:
-            track_kwargs['uri'] = "beetslocal:track:%s:%s" % (
-                item['id'],
-                self._decode_path(item['path']))
+        if 'id' in item:
+            track_kwargs['uri'] = track_uri(item['id'])
+            if item.get('path'):
+                self.path_cache.put(item['id'], bytes(item['path']))
 
         if 'length' in item:
             track_kwargs['length'] = int(item['length']) * 1000
@@ -557,10 +994,23 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
 
     def _convert_album(self, album):
         """
-        Transforms a beets album into a mopidy Track
+        Transforms a beets album into a mopidy Album,
+        reusing a cached Album while the library is unchanged
         """
         if not album:
             return
+        checkpoint()
+        if self.model_cache is None:
+            return self._build_album(album)
+        self._validate_model_cache()
+        key = ('album', album['id'])
+        result = self.model_cache.get(key)
+        if result is None:
+            result = self._build_album(album)
+            self.model_cache.put(key, result)
+        return result
+
+    def _build_album(self, album):
         album_kwargs = {}
         artist_kwargs = {}
 
@@ -601,8 +1051,8 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
         # if 'added' in item:
         #    album_kwargs['last_modified'] = album['added']
 
-        if 'artpath' in album:
-            album_kwargs['images'] = [album['artpath']]
+        if 'artpath' in album and album['artpath']:
+            album_kwargs['images'] = [image_uri(album['artpath'])]
 
         if 'albumartist' in album:
             artist_kwargs['name'] = album['albumartist']
@@ -615,7 +1065,7 @@ class BeetsLocalLibraryProvider(backend.LibraryProvider):
             album_kwargs['artists'] = [artist]
 
         if 'id' in album:
-            album_kwargs['uri'] = "beetslocal:album:%s:" % album['id']
+            album_kwargs['uri'] = album_uri(album['id'])
 
         album = Album(**album_kwargs)
         return album
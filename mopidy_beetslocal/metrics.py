@@ -0,0 +1,187 @@
+from __future__ import unicode_literals
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# upper bounds in ms of the histogram buckets, the last one is open
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000,
+           2500, 5000, 10000)
+
+PLACEHOLDERS = re.compile(r'\(\?(, \?)*\)')
+
+
+class Histogram(object):
+    """
+    Call count, total, min, max and bucketed durations in ms
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, ms, rows=0):
+        self.count += 1
+        self.total += ms
+        self.rows += rows
+        if self.min is None or ms < self.min:
+            self.min = ms
+        if self.max is None or ms > self.max:
+            self.max = ms
+        for pos, bound in enumerate(BUCKETS):
+            if ms <= bound:
+                self.buckets[pos] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """
+        Upper bound of the bucket holding the given fraction of calls,
+        the maximum for the open bucket
+        """
+        if not self.count:
+            return None
+        wanted = fraction * self.count
+        seen = 0
+        for pos, count in enumerate(self.buckets[:-1]):
+            seen += count
+            if seen >= wanted:
+                return min(BUCKETS[pos], self.max)
+        return self.max
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'rows': self.rows,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count
+            else None,
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'p50_ms': self.percentile(0.5),
+            'p90_ms': self.percentile(0.9),
+            'p99_ms': self.percentile(0.99),
+            'buckets': dict(zip([str(b) for b in BUCKETS] + ['inf'],
+                                self.buckets)),
+        }
+
+
+class Metrics(object):
+    """
+    Timing histograms of provider methods and SQL statement shapes,
+    plus sources of other statistics, such as cache hit ratios,
+    that are read when a snapshot is taken
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.methods = {}
+        self.statements = {}
+        self.sources = {}
+        self._lock = threading.Lock()
+
+    def observe(self, table, name, ms, rows=0):
+        with self._lock:
+            histogram = table.get(name)
+            if histogram is None:
+                histogram = table[name] = Histogram()
+            histogram.observe(ms, rows)
+
+    @contextlib.contextmanager
+    def method(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(self.methods, name, (time.time() - start) * 1000)
+
+    def statement(self, statement, ms, rows):
+        """
+        Records a statement, IN lists of any length count as one shape
+        """
+        self.observe(self.statements, PLACEHOLDERS.sub('(?...)', statement),
+                     ms, rows)
+
+    def add_source(self, name, stats):
+        """
+        stats is called for a dict whenever a snapshot is taken
+        """
+        self.sources[name] = stats
+
+    def snapshot(self):
+        with self._lock:
+            result = {
+                'uptime_s': round(time.time() - self.started, 1),
+                'methods': dict((name, h.stats())
+                                for name, h in self.methods.items()),
+                'statements': dict((name, h.stats())
+                                   for name, h in self.statements.items()),
+            }
+        for name, stats in self.sources.items():
+            result[name] = stats()
+        return result
+
+    def dump(self):
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def write(self, path):
+        """
+        Writes a snapshot to path, replacing it atomically
+        """
+        with open(path + '.tmp', 'w') as f:
+            f.write(self.dump())
+        os.rename(path + '.tmp', path)
+
+
+def metered(name):
+    """
+    Times the decorated provider method in self.metrics
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.method(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsWriter(threading.Thread):
+    """
+    Writes metrics to path every interval seconds and once more
+    when stopped
+    """
+
+    def __init__(self, metrics, path, interval):
+        super(MetricsWriter, self).__init__(name='BeetsLocalMetrics')
+        self.daemon = True
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            self.metrics.write(self.path)
+        except (IOError, OSError) as e:
+            logger.warning('BeetsLocalBackend: can not write metrics to '
+                           '%s: %s', self.path, e)
+
+    def stop(self):
+        self._stopped.set()
+        self.write()
@@ -0,0 +1,55 @@
+from __future__ import unicode_literals
+
+import Queue
+import contextlib
+import logging
+import sqlite3
+
+from . import deadline
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool(object):
+    """
+    A fixed set of read only SQLite connections to the library,
+    shared by all threads. Unlike beets transactions, which hold a
+    library wide lock, queries on different connections run
+    concurrently. A query waits until a connection is free.
+    """
+
+    def __init__(self, path, size, timeout=5.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = Queue.Queue()
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        # connections move between threads, but only one uses them
+        # at a time. query_only keeps them read only, the sqlite3
+        # module of python 2 can not open mode=ro uris.
+        connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                     check_same_thread=False,
+                                     cached_statements=256)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA query_only = ON')
+        deadline.watch(connection)
+        return connection
+
+    @contextlib.contextmanager
+    def connection(self):
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def query(self, statement, subvals=()):
+        with self.connection() as connection:
+            return connection.execute(statement, subvals).fetchall()
+
+    def close(self):
+        for _ in range(self.size):
+            self._idle.get().close()
@@ -0,0 +1,99 @@
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# mopidy query keys to the items columns they compare with
+ITEM_COLUMNS = {
+    'track_name': 'title',
+    'genre': 'genre',
+    'artist': 'artist',
+    'album': 'album',
+    'composer': 'composer',
+    'mb_trackid': 'mb_trackid',
+    'mb_albumid': 'mb_albumid',
+    'mb_albumartistid': 'mb_albumartistid',
+    'date': 'year',
+}
+
+# mopidy query keys to the albums columns they compare with,
+# used for albums and album artists
+ALBUM_COLUMNS = {
+    'genre': 'genre',
+    'artist': 'albumartist',
+    'album': 'album',
+    'mb_albumid': 'mb_albumid',
+    'mb_albumartistid': 'mb_albumartistid',
+    'date': 'year',
+}
+
+# beets default sort_item and sort_album
+ITEM_ORDER = 'artist COLLATE NOCASE, album COLLATE NOCASE, disc, track'
+ALBUM_ORDER = 'albumartist COLLATE NOCASE, album COLLATE NOCASE'
+
+# columns find_exact reads for tracks and albums
+TRACK_SELECT = ('id, title, day, month, year, artist, album, '
+                'composer, track, disc, length,  bitrate, comments, '
+                'mb_trackid, mtime, genre, tracktotal, disctotal, '
+                'mb_albumid, mb_albumartistid, albumartist, mb_artistid')
+ALBUM_SELECT = ('id, album, day, month, year, albumartist, disctotal, '
+                'mb_albumid, artpath, mb_albumartistid')
+
+
+class QueryBuilder(object):
+    """
+    Builds parameterized selects matching mopidy queries exactly.
+    The statement text only depends on the shape of the query,
+    which columns are compared with how many values, so it is
+    built once per shape and SQLite reuses the prepared statement
+    from its per connection statement cache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._statements)
+
+    def select(self, columns, table, query=None, mapping=None,
+               distinct=False, order_by=None):
+        """
+        Returns statement and parameters selecting columns from
+        the rows of table where every value of every query key equals
+        the column mapping gives for the key. Keys not in mapping
+        are ignored, without mapping keys are column names.
+        """
+        where = []
+        params = []
+        for key, values in sorted((query or {}).iteritems()):
+            column = key if mapping is None else mapping.get(key)
+            if column is not None:
+                where.append((column, len(values)))
+                params.extend(values)
+        shape = (columns, table, tuple(where), distinct, order_by)
+        with self._lock:
+            statement = self._statements.get(shape)
+            if statement is None:
+                self.misses += 1
+                statement = self._statements[shape] = self._build(*shape)
+            else:
+                self.hits += 1
+        return statement, params
+
+    def _build(self, columns, table, where, distinct, order_by):
+        statement = 'select %s%s from %s' % (
+            'distinct ' if distinct else '', columns, table)
+        conditions = []
+        for column, count in where:
+            conditions.extend(['%s = ?' % column] * count)
+        if conditions:
+            statement += ' where ' + ' and '.join(conditions)
+        if order_by:
+            statement += ' order by ' + order_by
+        logger.debug('New statement shape: %s', statement)
+        return statement
@@ -0,0 +1,49 @@
+from __future__ import unicode_literals
+
+import logging
+import marshal
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 'beetslocal-snapshot'
+# bump whenever the layout of a to_snapshot() result changes
+VERSION = 1
+
+
+def write(path, library, state):
+    """
+    Writes state, a dict of marshallable values, for library to
+    path. The file is replaced atomically.
+    """
+    start = time.time()
+    with open(path + '.tmp', 'wb') as f:
+        marshal.dump((MAGIC, VERSION, library, state), f, 2)
+    os.rename(path + '.tmp', path)
+    logger.info('Wrote snapshot %s in %.2fs', path, time.time() - start)
+
+
+def read(path, library, parts):
+    """
+    The state written for library to path, None if there is none,
+    it is of another version or library or lacks one of parts
+    """
+    start = time.time()
+    try:
+        with open(path, 'rb') as f:
+            magic, version, written_for, state = marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError) as e:
+        logger.debug('No usable snapshot %s: %s', path, e)
+        return None
+    if magic != MAGIC or version != VERSION or written_for != library:
+        logger.info('Ignoring snapshot %s of version %s for %s',
+                    path, version, written_for)
+        return None
+    missing = set(parts) - set(state)
+    if missing:
+        logger.info('Ignoring snapshot %s without %s',
+                    path, ', '.join(sorted(missing)))
+        return None
+    logger.info('Read snapshot %s in %.2fs', path, time.time() - start)
+    return state
@@ -0,0 +1,48 @@
+from __future__ import unicode_literals
+
+from uritools import uricompose, uriencode
+
+SCHEME = 'beetslocal'
+TRACK = 'track'
+ALBUM = 'album'
+
+
+def track_uri(beets_id):
+    """
+    Id only track uri, the path is looked up when playing
+    """
+    return 'beetslocal:track:%d:' % beets_id
+
+
+def album_uri(beets_id):
+    return 'beetslocal:album:%d:' % beets_id
+
+
+def artist_uri(kind, key):
+    """
+    beetslocal:<kind>:<key>: with key percent encoded,
+    kind is artist or composer
+    """
+    return 'beetslocal:%s:%s:' % (kind, uriencode(key or '', safe=''))
+
+
+def parse(uri):
+    """
+    Splits beetslocal:<type>:<id>[:<path>] in one pass into type,
+    integer id and the path older track uris carry, '' without one.
+    Raises ValueError for anything else.
+    """
+    parts = uri.split(':', 3)
+    if len(parts) < 3 or parts[0] != SCHEME:
+        raise ValueError('Invalid URI.')
+    return parts[1], int(parts[2]), parts[3] if len(parts) == 4 else ''
+
+
+def file_uri(path):
+    """
+    file URI of a filesystem path, characters outside ASCII
+    and reserved ones are percent encoded
+    """
+    if isinstance(path, unicode):
+        path = path.encode('utf-8')
+    return uricompose('file', '', bytes(path))
@@ -20,7 +20,7 @@ setup(
     author_email='rawdlite@googlemail.com',
     description='Access local beets library',
     long_description=open('README.rst').read(),
-    packages=find_packages(exclude=['tests', 'tests.*']),
+    packages=find_packages(exclude=['tests', 'tests.*', 'benchmarks', 'benchmarks.*']),
     zip_safe=False,
     include_package_data=True,
     install_requires=[
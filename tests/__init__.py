@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import ConfigParser
+import io
+
+import beets.library
+
+from mopidy_beetslocal import Extension
+
+
+ALBUMS = [
+    [dict(title='Human Behaviour', artist='Björk', album='Debut',
+          albumartist='Björk', genre='Pop', composer='Björk',
+          year=1993, month=7, day=5, track=1, disc=1, tracktotal=2,
+          length=252.0, mb_albumartistid='bjork-id', mb_albumid='debut-id',
+          mb_trackid='human-id', path=b'/music/Bjork/Debut/01.mp3'),
+     dict(title='Crying', artist='Björk', album='Debut',
+          albumartist='Björk', genre='Pop', composer='Björk',
+          year=1993, month=7, day=5, track=2, disc=1, tracktotal=2,
+          length=289.0, mb_albumartistid='bjork-id', mb_albumid='debut-id',
+          mb_trackid='crying-id', path=b'/music/Bjork/Debut/02.mp3')],
+    [dict(title='Svefn-g-englar', artist='Sigur Rós',
+          album='Ágætis byrjun', albumartist='Sigur Rós',
+          genre='Post-Rock', year=1999, month=6, day=12, track=1,
+          disc=1, tracktotal=1, length=604.0,
+          mb_albumartistid='sigur-id', mb_albumid='agaetis-id',
+          mb_trackid='svefn-id',
+          path=b'/music/Sigur Ros/01.flac')],
+    [dict(title='Army of Me', artist='Björk', album='Pop Hits',
+          albumartist='Various Artists', genre='Pop', year=1995,
+          track=1, disc=1, tracktotal=2, length=234.0,
+          mb_albumartistid='various-id', mb_albumid='hits-id',
+          mb_trackid='army-id', path=b'/music/Various/01.mp3'),
+     dict(title='Hoppípolla', artist='Sigur Rós', album='Pop Hits',
+          albumartist='Various Artists', genre='Pop', year=1995,
+          track=2, disc=1, tracktotal=2, length=268.0,
+          mb_albumartistid='various-id', mb_albumid='hits-id',
+          mb_trackid='hoppi-id', path=b'/music/Various/02.mp3')],
+]
+
+
+def make_library(path, albums=ALBUMS):
+    """
+    Creates a small beets library at path
+    """
+    lib = beets.library.Library(path)
+    for tracks in albums:
+        lib.add_album([beets.library.Item(**track) for track in tracks])
+    return lib
+
+
+def make_config(library, **options):
+    """
+    The extension defaults for library, updated with options
+    """
+    ext = Extension()
+    parser = ConfigParser.RawConfigParser()
+    parser.readfp(io.BytesIO(ext.get_default_config()))
+    values, errors = ext.get_config_schema().deserialize(
+        dict(parser.items('beetslocal')))
+    values['beetslibrary'] = library
+    values.update(options)
+    return {'beetslocal': values}
@@ -0,0 +1,45 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from mopidy_beetslocal.browse import BrowseCache, browse_key
+
+
+class BrowseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = BrowseCache()
+        self.cache.track([(1, 'Pop', 'a'), (2, 'Rock', 'b')])
+        for key in [('root',), ('genre', 'Pop'), ('genre', 'Rock'),
+                    ('artist', 'Pop', 'a'), ('artist', 'Rock', 'b'),
+                    ('album', '1'), ('album', '2')]:
+            self.cache.put(key, [key])
+
+    def test_browse_key(self):
+        self.assertEqual(browse_key('root', {}), ('root',))
+        self.assertEqual(browse_key('artist', {'genre': ['Pop'],
+                                               'artist': ['a']}),
+                         ('artist', 'Pop', 'a'))
+        self.assertEqual(browse_key('album', {'album': ['1']}),
+                         ('album', '1'))
+        self.assertIsNone(browse_key('foo', {}))
+
+    def test_get(self):
+        self.assertEqual(self.cache.get(('genre', 'Pop')), [('genre', 'Pop')])
+        self.assertIsNone(self.cache.get(('genre', 'Jazz')))
+
+    def test_invalidate_moved_album(self):
+        self.cache.invalidate([1], [(1, 'Jazz', 'a')])
+        self.assertIsNone(self.cache.get(('root',)))
+        self.assertIsNone(self.cache.get(('genre', 'Pop')))
+        self.assertIsNone(self.cache.get(('artist', 'Pop', 'a')))
+        self.assertIsNone(self.cache.get(('album', '1')))
+        self.assertIsNotNone(self.cache.get(('genre', 'Rock')))
+        self.assertIsNotNone(self.cache.get(('artist', 'Rock', 'b')))
+        self.assertIsNotNone(self.cache.get(('album', '2')))
+
+    def test_invalidate_removed_album(self):
+        self.cache.invalidate([2], [])
+        self.assertIsNone(self.cache.get(('genre', 'Rock')))
+        self.assertIsNotNone(self.cache.get(('genre', 'Pop')))
+        self.assertEqual(len(self.cache), 3)
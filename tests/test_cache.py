@@ -0,0 +1,35 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from mopidy_beetslocal.cache import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_stale_stamp_is_a_miss(self):
+        cache = LRUCache(2)
+        cache.put('a', 1, stamp=10.0)
+        self.assertIsNone(cache.get('a', 11.0))
+        self.assertNotIn('a', cache)
+        cache.put('a', 1, stamp=11.0)
+        self.assertEqual(cache.get('a', 11.0), 1)
+
+    def test_stats(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.get('b')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.5)
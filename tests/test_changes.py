@@ -0,0 +1,56 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from mopidy_beetslocal.changes import ChangeTracker, LibraryWatcher
+
+from tests import make_library
+
+
+class ChangeTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.lib = make_library(os.path.join(self.tempdir, 'library.db'))
+        self.tracker = ChangeTracker()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_first_scan_touches_everything(self):
+        changes = self.tracker.scan(self.lib)
+        self.assertEqual(changes.items, set([1, 2, 3, 4, 5]))
+        self.assertEqual(changes.albums, set([1, 2, 3]))
+
+    def test_scan_reports_deltas(self):
+        self.tracker.scan(self.lib)
+        self.assertEqual(self.tracker.scan(self.lib), (set(), set()))
+        item = self.lib.get_item(1)
+        item.mtime = 42.0
+        item.store()
+        self.lib.get_item(5).remove()
+        changes = self.tracker.scan(self.lib)
+        self.assertEqual(changes.items, set([1, 5]))
+        self.assertEqual(changes.albums, set([1, 3]))
+
+
+class LibraryWatcherTest(unittest.TestCase):
+
+    def test_calls_back_on_change(self):
+        tempdir = tempfile.mkdtemp()
+        path = os.path.join(tempdir, 'library.db')
+        make_library(path, albums=[])
+        changed = threading.Event()
+        watcher = LibraryWatcher(path, 0.01, changed.set)
+        watcher.start()
+        try:
+            self.assertFalse(changed.wait(0.05))
+            make_library(path)
+            self.assertTrue(changed.wait(1))
+        finally:
+            watcher.stop()
+            shutil.rmtree(tempdir)
@@ -0,0 +1,48 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from mopidy_beetslocal.convert import RowConverter
+
+
+def track_row(beets_id, title, artist='Artist', year=2001, composer=''):
+    return (beets_id, title, 2, 3, year, artist, 'Album', composer, 1, 1,
+            200.5, 320, '', 'track-%d' % beets_id, 10.0, 'Rock', 2, 1,
+            'album-id', 'albumartist-id', 'Album Artist', 'artist-id')
+
+
+class RowConverterTest(unittest.TestCase):
+
+    def test_tracks(self):
+        tracks = RowConverter().tracks([track_row(1, 'One'),
+                                        track_row(2, 'Two', composer='C')])
+        one, two = tracks
+        self.assertEqual(one.uri, 'beetslocal:track:1:')
+        self.assertEqual(one.date, '2001-03-02')
+        self.assertEqual(one.length, 200000)
+        self.assertEqual(one.last_modified, 10000)
+        self.assertEqual(one.composers, frozenset())
+        self.assertEqual([c.name for c in two.composers], ['C'])
+        self.assertIs(one.album, two.album)
+        self.assertIs(list(one.artists)[0], list(two.artists)[0])
+        self.assertEqual(list(one.album.artists)[0].uri,
+                         'beetslocal:artist:albumartist-id:')
+
+    def test_invalid_date(self):
+        converter = RowConverter()
+        self.assertIsNone(converter.date(2001, 0, 0))
+        self.assertIsNone(converter.date(None, None, None))
+        track = converter.tracks([track_row(1, 'One', year=0)])[0]
+        self.assertIsNone(track.date)
+
+    def test_albums(self):
+        rows = [(1, 'Album', 2, 3, 2001, 'Artist', 1, 'album-id',
+                 b'/covers/a b.jpg', 'artist-id'),
+                (2, 'Other', 0, 0, 0, 'Artist', 1, 'other-id', None,
+                 'artist-id')]
+        first, second = RowConverter().albums(rows)
+        self.assertEqual(first.uri, 'beetslocal:album:1:')
+        self.assertEqual(first.images, frozenset(['file:///covers/a%20b.jpg']))
+        self.assertEqual(second.images, frozenset())
+        self.assertIsNone(second.date)
+        self.assertIs(list(first.artists)[0], list(second.artists)[0])
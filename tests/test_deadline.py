@@ -0,0 +1,49 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from mopidy_beetslocal.deadline import Cancelled, Deadline, checkpoint
+from mopidy_beetslocal.pool import ConnectionPool
+
+from tests import make_library
+
+# counts far enough to outlast any deadline used here
+SLOW = ('with recursive n(i) as (select 1 union all '
+        'select i + 1 from n where i < 100000000) select count(*) from n')
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_checkpoint(self):
+        checkpoint()
+        with Deadline().running():
+            checkpoint()
+        deadline = Deadline(60)
+        with deadline.running():
+            checkpoint()
+            deadline.cancel()
+            self.assertRaises(Cancelled, checkpoint)
+        checkpoint()
+
+    def test_expired(self):
+        self.assertFalse(Deadline().expired())
+        self.assertFalse(Deadline(60).expired())
+        self.assertTrue(Deadline(-1).expired())
+
+    def test_interrupts_statements(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'library.db')
+            make_library(path)
+            pool = ConnectionPool(path, 1)
+            with Deadline(0.05).running():
+                self.assertRaises(sqlite3.OperationalError, pool.query, SLOW)
+            self.assertEqual(pool.query('select count(*) from items')[0][0],
+                             5)
+            pool.close()
+        finally:
+            shutil.rmtree(tempdir)
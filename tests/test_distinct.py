@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mopidy_beetslocal.distinct import DistinctIndex
+
+from tests import make_library
+
+
+class DistinctIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.lib = make_library(os.path.join(self.tempdir, 'library.db'))
+        self.index = DistinctIndex.from_library(self.lib)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_distinct(self):
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.distinct('albumartist'),
+                         set(['Björk', 'Sigur Rós', 'Various Artists']))
+        self.assertEqual(self.index.distinct('date'),
+                         set(['1993', '1995', '1999']))
+        self.assertEqual(self.index.distinct('composer'), set(['Björk']))
+        self.assertEqual(self.index.distinct('performer'), set())
+
+    def test_filtered(self):
+        self.assertEqual(
+            self.index.distinct('album', {'artist': ['Björk']}),
+            set(['Debut', 'Pop Hits']))
+        self.assertEqual(
+            self.index.distinct('track_name', {'artist': ['Björk'],
+                                               'date': ['1995']}),
+            set(['Army of Me']))
+        self.assertEqual(
+            self.index.distinct('track_no', {'album': ['Debut']}),
+            set([1, 2]))
+        self.assertEqual(self.index.distinct('genre', {'date': ['x']}),
+                         set())
+
+    def test_reload(self):
+        item = self.lib.get_item(3)
+        item.genre = 'Ambient'
+        item.store()
+        self.lib.get_item(1).remove()
+        self.index.reload(self.lib, [1, 3])
+        self.assertEqual(self.index.distinct('genre'),
+                         set(['Ambient', 'Pop']))
+        self.assertEqual(
+            self.index.distinct('track_name', {'album': ['Debut']}),
+            set(['Crying']))
@@ -18,6 +18,20 @@ class ExtensionTest(unittest.TestCase):
         self.assertIn('enabled = true', config)
         self.assertIn('beetslibrary =', config)
         self.assertIn('use_original_release_date', config)
+        self.assertIn('in_memory_index = false', config)
+        self.assertIn('model_cache_size = 0', config)
+        self.assertIn('search_all_limit = 0', config)
+        self.assertIn('fts_index = false', config)
+        self.assertIn('refresh_interval = 0', config)
+        self.assertIn('connection_pool_size = 0', config)
+        self.assertIn('browse_cache = false', config)
+        self.assertIn('create_indexes = false', config)
+        self.assertIn('distinct_index = false', config)
+        self.assertIn('thumbnail_size = 0', config)
+        self.assertIn('query_timeout = 0', config)
+        self.assertIn('metrics_file =', config)
+        self.assertIn('metrics_interval = 60', config)
+        self.assertIn('snapshot = false', config)
 
     def test_get_config_schema(self):
         ext = Extension()
@@ -25,6 +39,20 @@ class ExtensionTest(unittest.TestCase):
         schema = ext.get_config_schema()
         self.assertIn('enabled', schema)
         self.assertIn('beetslibrary', schema)
+        self.assertIn('in_memory_index', schema)
+        self.assertIn('model_cache_size', schema)
+        self.assertIn('search_all_limit', schema)
+        self.assertIn('fts_index', schema)
+        self.assertIn('refresh_interval', schema)
+        self.assertIn('connection_pool_size', schema)
+        self.assertIn('browse_cache', schema)
+        self.assertIn('create_indexes', schema)
+        self.assertIn('distinct_index', schema)
+        self.assertIn('thumbnail_size', schema)
+        self.assertIn('query_timeout', schema)
+        self.assertIn('metrics_file', schema)
+        self.assertIn('metrics_interval', schema)
+        self.assertIn('snapshot', schema)
 
     def test_setup(self):
         registry = mock.Mock()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mopidy_beetslocal import fts
+
+from tests import make_library
+
+
+class FullTextIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'library.db')
+        self.lib = make_library(self.path)
+        self.index = fts.FullTextIndex(self.path + '.fts', self.path)
+        self.index.sync()
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tempdir)
+
+    def test_build_match(self):
+        self.assertEqual(fts.build_match({'track_name': ['army of']},
+                                         fts.ITEM_KEYS),
+                         'title : "army"* AND title : "of"*')
+        self.assertEqual(fts.build_match({'any': ['"x"']}, fts.ITEM_KEYS),
+                         '"x"*')
+        self.assertIsNone(fts.build_match({'date': ['1993']},
+                                          fts.ITEM_KEYS))
+
+    def test_search(self):
+        self.assertEqual(
+            sorted(self.index.search_items({'artist': ['sigur']})), [3, 5])
+        self.assertEqual(
+            sorted(self.index.search_items({'any': ['bjork']})), [1, 2, 4])
+        self.assertEqual(self.index.search_albums({'artist': ['various']}),
+                         [3])
+        self.assertIsNone(self.index.search_albums({'composer': ['x']}))
+
+    def test_sync_applies_changes(self):
+        self.assertEqual(self.index.sync(), 0)
+        item = self.lib.get_item(1)
+        item.title = 'Venus as a Boy'
+        item.store()
+        self.lib.get_item(2).remove()
+        self.assertEqual(self.index.sync(), 2)
+        self.assertEqual(self.index.search_items({'track_name': ['venus']}),
+                         [1])
+        self.assertEqual(self.index.search_items({'album': ['debut']}), [1])
@@ -0,0 +1,43 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mopidy_beetslocal.images import Thumbnails, image_uri
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+
+class ImageUriTest(unittest.TestCase):
+
+    def test_image_uri(self):
+        self.assertEqual(image_uri(b'/music/a b/cover.jpg'),
+                         'file:///music/a%20b/cover.jpg')
+        self.assertIsNone(image_uri(None))
+        self.assertIsNone(image_uri(b''))
+
+
+@unittest.skipIf(PILImage is None, 'PIL is not installed')
+class ThumbnailsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cover = os.path.join(self.tempdir, 'cover.png').encode('utf-8')
+        PILImage.new(str('RGBA'), (400, 200)).save(self.cover)
+        self.thumbnails = Thumbnails(os.path.join(self.tempdir, 'thumbs'), 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_image(self):
+        image = self.thumbnails.image(self.cover)
+        self.assertEqual((image.width, image.height), (100, 50))
+        self.assertTrue(os.path.exists(self.thumbnails.path(self.cover)))
+
+    def test_missing(self):
+        self.assertIsNone(self.thumbnails.image(b'/nonexistent.jpg'))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mopidy_beetslocal.index import LibraryIndex
+
+from tests import make_library
+
+
+class LibraryIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'library.db')
+        self.lib = make_library(self.path)
+        self.index = LibraryIndex.from_library(self.lib)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def titles(self, rows):
+        return sorted(row['title'] for row in rows)
+
+    def test_loads_tables(self):
+        self.assertEqual(len(self.index.items), 5)
+        self.assertEqual(len(self.index.albums), 3)
+        self.assertEqual(self.index.get_item(1)['title'], 'Human Behaviour')
+        self.assertEqual(self.index.get_item(1).path,
+                         b'/music/Bjork/Debut/01.mp3')
+        self.assertIsNone(self.index.get_item(42))
+
+    def test_strings_are_interned(self):
+        column = self.index.items.columns['albumartist']
+        self.assertEqual(column[0], column[1])
+        self.assertEqual(self.index.items.columns['genre'][0],
+                         self.index.albums.columns['genre'][0])
+
+    def test_search_is_case_insensitive_substring(self):
+        self.assertEqual(
+            self.titles(self.index.search_items({'artist': ['BJÖ']})),
+            ['Army of Me', 'Crying', 'Human Behaviour'])
+
+    def test_search_any(self):
+        self.assertEqual(
+            self.titles(self.index.search_items({'any': ['ágætis']})),
+            ['Svefn-g-englar'])
+        self.assertEqual(
+            len(self.index.search_albums({'any': ['pop']})), 2)
+
+    def test_search_combines_keys(self):
+        query = {'artist': ['sigur'], 'album': ['hits']}
+        self.assertEqual(self.titles(self.index.search_items(query)),
+                         ['Hoppípolla'])
+
+    def test_search_unknown_field(self):
+        self.assertEqual(self.index.search_items({'label': ['x']}), [])
+
+    def test_find_is_exact(self):
+        self.assertEqual(self.index.find_items({'artist': ['Björk'],
+                                                'date': ['1993']})[0].title,
+                         'Human Behaviour')
+        self.assertEqual(self.index.find_items({'artist': ['björk']}), [])
+        self.assertEqual(
+            [a.album for a in self.index.find_albums({'artist': ['Björk']})],
+            ['Debut'])
+
+    def test_browse(self):
+        self.assertEqual(self.index.genres(), [('Pop',), ('Post-Rock',)])
+        self.assertEqual(self.index.album_artists({'genre': ['Pop']}),
+                         [('Björk', 'bjork-id'),
+                          ('Various Artists', 'various-id')])
+        albums = self.index.artist_albums('various-id', 'Pop')
+        self.assertEqual([a.album for a in albums], ['Pop Hits'])
+        self.assertEqual(self.titles(self.index.album_items(albums[0].id)),
+                         ['Army of Me', 'Hoppípolla'])
+
+    def test_reload(self):
+        item = self.lib.get_item(1)
+        item.title = 'Venus as a Boy'
+        item.store()
+        self.lib.get_item(2).remove()
+        album = self.lib.get_album(2)
+        album.genre = 'Rock'
+        album.store()
+        self.index.reload(self.lib, [1, 2], [2])
+        self.assertEqual(len(self.index.items), 4)
+        self.assertIsNone(self.index.get_item(2))
+        self.assertEqual(self.titles(self.index.search_items({})),
+                         ['Army of Me', 'Hoppípolla', 'Svefn-g-englar',
+                          'Venus as a Boy'])
+        self.assertEqual(self.index.genres(), [('Pop',), ('Rock',)])
@@ -0,0 +1,51 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mopidy_beetslocal import indexes
+
+from tests import make_library
+
+
+class IndexesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.lib = make_library(os.path.join(self.tempdir, 'library.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def plans(self):
+        with self.lib.transaction() as tx:
+            return dict((name, ' '.join(plan))
+                        for name, statement, plan in indexes.explain(tx))
+
+    def names(self):
+        with self.lib.transaction() as tx:
+            return set(row[0] for row in tx.query(
+                'select name from sqlite_master where type = "index" '
+                'and name like "beetslocal_%"'))
+
+    def test_create_and_drop(self):
+        with self.lib.transaction() as tx:
+            indexes.create_indexes(tx)
+            indexes.create_indexes(tx)
+        self.assertEqual(self.names(),
+                         set(name for name, _, _ in indexes.INDEXES))
+        with self.lib.transaction() as tx:
+            indexes.drop_indexes(tx)
+        self.assertEqual(self.names(), set())
+
+    def test_explain_uses_indexes(self):
+        self.assertIn('SCAN', self.plans()['find tracks by genre'])
+        with self.lib.transaction() as tx:
+            indexes.create_indexes(tx)
+        plans = self.plans()
+        for name in ('browse genre', 'browse artist', 'browse album',
+                     'find tracks by genre', 'find albums by artist',
+                     'lookup albums'):
+            self.assertIn('USING', plans[name])
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+
+from mopidy_beetslocal import actor, library
+
+from tests import make_config, make_library
+
+
+class LibraryProviderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'library.db')
+        make_library(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def backend(self, **options):
+        return actor.BeetsLocalBackend(
+            config=make_config(self.path, **options), audio=None)
+
+    def test_index_matches_sql(self):
+        sql = self.backend().library
+        memory = self.backend(in_memory_index=True).library
+        for query in ({'artist': ['sigur']}, {'album': ['debut']}, {}):
+            self.assertEqual(memory.search(dict(query)),
+                             sql.search(dict(query)))
+        self.assertEqual(memory.browse('beetslocal:root'),
+                         sql.browse('beetslocal:root'))
+        self.assertEqual(memory.get_distinct('artist', {'genre': ['Pop']}),
+                         sql.get_distinct('artist', {'genre': ['Pop']}))
+
+    def test_get_distinct(self):
+        sql = self.backend().library
+        indexed = self.backend(distinct_index=True).library
+        for field, query in (('artist', None), ('albumartist', None),
+                             ('album', {'artist': ['Sigur Rós']}),
+                             ('date', {'genre': ['Pop']}),
+                             ('disc_no', None), ('performer', None),
+                             ('track_name', {'date': ['1995-01-01']})):
+            self.assertEqual(indexed.get_distinct(field, query),
+                             sql.get_distinct(field, query))
+        self.assertEqual(sql.get_distinct('album', {'artist': ['Sigur Rós']}),
+                         set(['Ágætis byrjun', 'Pop Hits']))
+        self.assertEqual(sql.get_distinct('date', {'genre': ['Pop']}),
+                         set(['1993', '1995']))
+
+    def test_translate_uri(self):
+        lib = make_library(self.path, albums=[])
+        item = lib.get_item(3)
+        item.path = b'/music/Sigur R\xc3\xb3s/01.flac'
+        item.store()
+        for options in ({}, {'in_memory_index': True}):
+            backend = self.backend(**options)
+            track = backend.library.lookup('beetslocal:track:3:')[0]
+            self.assertEqual(track.uri, 'beetslocal:track:3:')
+            expected = 'file:///music/Sigur%20R%C3%B3s/01.flac'
+            for uri in (track.uri, 'beetslocal:track:3:/old/path.flac'):
+                self.assertEqual(backend.playback.translate_uri(uri),
+                                 expected)
+            self.assertEqual(
+                backend.playback.translate_uri('beetslocal:track:42:/a.mp3'),
+                'file:///a.mp3')
+            self.assertIsNone(
+                backend.playback.translate_uri('beetslocal:track:42:'))
+            self.assertIsNone(backend.playback.translate_uri('foo'))
+
+    def test_get_images(self):
+        lib = make_library(self.path, albums=[])
+        album = lib.get_album(2)
+        album.artpath = b'/music/Sigur R\xc3\xb3s/cover.jpg'
+        album.store()
+        library = self.backend().library
+        uris = ['beetslocal:track:3:', 'beetslocal:album:2:',
+                'beetslocal:album:1:', 'beetslocal:track:42:', 'foo']
+        result = library.get_images(uris)
+        cover = 'file:///music/Sigur%20R%C3%B3s/cover.jpg'
+        self.assertEqual([i.uri for i in result[uris[0]]], [cover])
+        self.assertEqual(result[uris[1]], result[uris[0]])
+        self.assertEqual(result[uris[2]], [])
+        self.assertEqual(result[uris[3]], [])
+        self.assertEqual(result[uris[4]], [])
+        with mock.patch.object(library, '_select_ids') as select:
+            select.return_value = []
+            self.assertEqual(library.get_images(uris[:3]),
+                             dict((uri, result[uri]) for uri in uris[:3]))
+            self.assertFalse(any(call[0][2] for call in select.call_args_list))
+
+    def test_find_exact(self):
+        library = self.backend().library
+        result = library.search({'artist': ['Björk'], 'date': ['1995']},
+                                exact=True)
+        self.assertEqual([t.name for t in result.tracks], ['Army of Me'])
+        self.assertIsNone(result.tracks[0].date)
+        self.assertEqual([a.name for a in result.albums], [])
+        result = library.search({'album': ['Debut']}, exact=True)
+        self.assertEqual(sorted(t.name for t in result.tracks),
+                         ['Crying', 'Human Behaviour'])
+        self.assertIs(result.tracks[0].album, result.tracks[1].album)
+        self.assertEqual(result.tracks[0].date, '1993-07-05')
+        self.assertEqual([a.uri for a in result.albums],
+                         ['beetslocal:album:1:'])
+
+    def test_query_timeout(self):
+        for options in ({}, {'in_memory_index': True}):
+            library = self.backend(query_timeout=5, **options).library
+            with mock.patch.object(library, '_build_track',
+                                   side_effect=lambda item: time.sleep(0.01)):
+                self.assertEqual(library.search({'album': ['Pop']}).tracks,
+                                 ())
+            self.assertEqual(len(library.search({'album': ['Pop']}).tracks),
+                             2)
+
+    def test_metrics(self):
+        backend = self.backend(model_cache_size=10)
+        backend.library.search({'album': ['Pop']})
+        backend.library.browse('beetslocal:album?album=3')
+        backend.playback.translate_uri('beetslocal:track:4:')
+        metrics = backend.library.metrics.snapshot()
+        for name in ('search', 'convert', 'browse', 'translate_uri',
+                     'get_path'):
+            self.assertEqual(metrics['methods'][name]['count'], 1)
+        self.assertIn('beets items query', metrics['statements'])
+        self.assertEqual(metrics['model_cache']['misses'], 3)
+
+    def test_snapshot(self):
+        options = dict(snapshot=True, in_memory_index=True,
+                       distinct_index=True)
+        backend = self.backend(**options)
+        backend.playback.translate_uri('beetslocal:track:1:')
+        backend.on_stop()
+        lib = make_library(self.path, albums=[])
+        item = lib.get_item(1)
+        item.title = 'Venus as a Boy'
+        item.path = b'/music/Bjork/Debut/03.mp3'
+        item.mtime = 42.0
+        item.store()
+        with mock.patch.object(library.LibraryIndex, 'from_library') as build:
+            restored = self.backend(**options)
+            self.assertFalse(build.called)
+        fresh = self.backend(in_memory_index=True, distinct_index=True)
+        for provider in (restored.library, fresh.library):
+            self.assertEqual(
+                [t.name for t in provider.search({'album': ['debut']}).tracks],
+                ['Venus as a Boy', 'Crying'])
+            self.assertEqual(provider.get_distinct('track_name',
+                                                   {'album': ['Debut']}),
+                             set(['Venus as a Boy', 'Crying']))
+        self.assertEqual(
+            restored.playback.translate_uri('beetslocal:track:1:'),
+            'file:///music/Bjork/Debut/03.mp3')
+
+    def test_lookup_many(self):
+        uris = ['beetslocal:track:1:/music/Bjork/Debut/01.mp3',
+                'beetslocal:album:3:', 'beetslocal:track:42:', 'foo']
+        for options in ({}, {'in_memory_index': True}):
+            result = self.backend(**options).library.lookup_many(uris)
+            self.assertEqual([t.name for t in result[uris[0]]],
+                             ['Human Behaviour'])
+            self.assertEqual(sorted(t.name for t in result[uris[1]]),
+                             ['Army of Me', 'Hoppípolla'])
+            self.assertEqual(result[uris[2]], [])
+            self.assertEqual(result[uris[3]], [])
+
+    def test_model_cache(self):
+        library = self.backend(model_cache_size=10).library
+        first = library.search({'artist': ['björk']})
+        second = library.search({'artist': ['björk']})
+        self.assertEqual(first, second)
+        self.assertIs(first.tracks[0], second.tracks[0])
+        self.assertEqual(library.cache_stats()['hits'], 4)
+
+    def test_model_cache_drops_entries_on_library_change(self):
+        library = self.backend(model_cache_size=10).library
+        track = library.lookup('beetslocal:track:1:')[0]
+        item = make_library(self.path, albums=[]).get_item(1)
+        item.title = 'Human Behavior'
+        item.store()
+        library._version_checked = 0
+        self.assertIsNot(library.lookup('beetslocal:track:1:')[0], track)
+        self.assertEqual(library.lookup('beetslocal:track:1:')[0].name,
+                         'Human Behavior')
+
+    def test_search_all_streams_pages(self):
+        with mock.patch.object(library, 'PAGE_SIZE', 2):
+            result = self.backend().library.search()
+        self.assertEqual(result.uri, 'beetslocal:search-all')
+        self.assertEqual(len(result.tracks), 5)
+        self.assertEqual(len(result.albums), 3)
+
+    def test_search_all_limit(self):
+        for options in ({}, {'in_memory_index': True}):
+            result = self.backend(search_all_limit=2, **options).library \
+                .search()
+            self.assertEqual(len(result.tracks), 2)
+            self.assertEqual(len(result.albums), 2)
+
+    def test_fts_search(self):
+        library = self.backend(fts_index=True).library
+        self.assertIsNotNone(library.fts)
+        result = library.search({'artist': ['sigur ros']})
+        self.assertEqual(sorted(t.name for t in result.tracks),
+                         ['Hoppípolla', 'Svefn-g-englar'])
+        self.assertEqual([a.name for a in result.albums], ['Ágætis byrjun'])
+
+    def test_refresh(self):
+        library = self.backend(in_memory_index=True, fts_index=True,
+                               model_cache_size=10).library
+        self.assertEqual(library.lookup('beetslocal:track:1:')[0].name,
+                         'Human Behaviour')
+        lib = make_library(self.path, albums=[])
+        item = lib.get_item(1)
+        item.title = 'Venus as a Boy'
+        item.mtime = 42.0
+        item.store()
+        library.refresh()
+        self.assertEqual(library.lookup('beetslocal:track:1:')[0].name,
+                         'Venus as a Boy')
+        self.assertEqual(
+            [t.name for t in library.search({'track_name': ['venus']}).tracks],
+            ['Venus as a Boy'])
+
+    def test_connection_pool_matches_beets(self):
+        beets = self.backend().library
+        pooled = self.backend(connection_pool_size=2).library
+        self.assertIsNotNone(pooled.pool)
+        self.assertEqual(pooled.browse('beetslocal:root'),
+                         beets.browse('beetslocal:root'))
+        self.assertEqual(pooled.get_distinct('artist'),
+                         beets.get_distinct('artist'))
+        self.assertEqual(pooled.search(), beets.search())
+
+    def test_browse_cache(self):
+        uris = ['beetslocal:root', 'beetslocal:genre?genre=Pop',
+                'beetslocal:artist?genre=Pop&artist=various-id',
+                'beetslocal:album?album=3']
+        plain = self.backend().library
+        cached = self.backend(browse_cache=True).library
+        for uri in uris:
+            self.assertEqual(cached.browse(uri), plain.browse(uri))
+            self.assertIs(cached.browse(uri), cached.browse(uri))
+        album = make_library(self.path, albums=[]).get_album(3)
+        album.genre = 'Compilation'
+        album.store()
+        for item in album.items():
+            item.mtime = 42.0
+            item.store()
+        cached.refresh()
+        self.assertEqual(len(cached.browse_cache), 0)
+        self.assertEqual([ref.name for ref in cached.browse(uris[0])],
+                         ['Compilation', 'Pop', 'Post-Rock'])
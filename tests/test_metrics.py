@@ -0,0 +1,73 @@
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mopidy_beetslocal.metrics import (Histogram, Metrics, MetricsWriter,
+                                       metered)
+
+
+class Provider(object):
+
+    def __init__(self):
+        self.metrics = Metrics()
+
+    @metered('work')
+    def work(self, value):
+        return value * 2
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_observe(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(0.5))
+        for ms in (0.05, 3, 3, 4, 20000):
+            histogram.observe(ms, rows=2)
+        stats = histogram.stats()
+        self.assertEqual(stats['count'], 5)
+        self.assertEqual(stats['rows'], 10)
+        self.assertEqual(stats['min_ms'], 0.05)
+        self.assertEqual(stats['max_ms'], 20000)
+        self.assertEqual(stats['p50_ms'], 5)
+        self.assertEqual(stats['p99_ms'], 20000)
+        self.assertEqual(stats['buckets']['inf'], 1)
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_metered(self):
+        provider = Provider()
+        self.assertEqual(provider.work(2), 4)
+        self.assertEqual(provider.work.__name__, 'work')
+        self.assertEqual(
+            provider.metrics.snapshot()['methods']['work']['count'], 1)
+
+    def test_statement_shapes(self):
+        metrics = Metrics()
+        metrics.statement('select * from items where id in (?)', 1.0, 1)
+        metrics.statement('select * from items where id in (?, ?, ?)', 2.0, 3)
+        statements = metrics.snapshot()['statements']
+        self.assertEqual(list(statements),
+                         ['select * from items where id in (?...)'])
+        self.assertEqual(statements.values()[0]['rows'], 4)
+
+    def test_sources(self):
+        metrics = Metrics()
+        metrics.add_source('cache', lambda: {'hits': 3})
+        self.assertEqual(json.loads(metrics.dump())['cache'], {'hits': 3})
+
+    def test_writer(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'metrics.json')
+            writer = MetricsWriter(Metrics(), path, 60)
+            writer.start()
+            writer.stop()
+            with open(path) as f:
+                self.assertIn('methods', json.load(f))
+        finally:
+            shutil.rmtree(tempdir)
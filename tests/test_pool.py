@@ -0,0 +1,47 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from mopidy_beetslocal.pool import ConnectionPool
+
+from tests import make_library
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'library.db')
+        make_library(self.path)
+        self.pool = ConnectionPool(self.path, 2)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.tempdir)
+
+    def test_query(self):
+        rows = self.pool.query('select id, title from items where id = ?',
+                               (1,))
+        self.assertEqual(rows[0][str('title')], 'Human Behaviour')
+
+    def test_read_only(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            self.pool.query('delete from items')
+
+    def test_shared_between_threads(self):
+        results = []
+
+        def query():
+            results.append(len(self.pool.query('select id from items')))
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [5, 5, 5, 5])
@@ -0,0 +1,41 @@
+from __future__ import unicode_literals
+
+import unittest
+
+from mopidy_beetslocal.query import ALBUM_COLUMNS, QueryBuilder
+
+
+class QueryBuilderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.builder = QueryBuilder()
+
+    def test_select(self):
+        statement, params = self.builder.select(
+            'id', 'albums', {'artist': ['a', 'b'], 'date': ['1999']},
+            ALBUM_COLUMNS, order_by='id')
+        self.assertEqual(statement,
+                         'select id from albums where albumartist = ? and '
+                         'albumartist = ? and year = ? order by id')
+        self.assertEqual(params, ['a', 'b', '1999'])
+
+    def test_select_ignores_unknown_keys(self):
+        statement, params = self.builder.select(
+            'id', 'albums', {'any': ['x']}, ALBUM_COLUMNS, distinct=True)
+        self.assertEqual(statement, 'select distinct id from albums')
+        self.assertEqual(params, [])
+
+    def test_values_are_parameters(self):
+        statement, params = self.builder.select(
+            'id', 'items', {'title': ['Rock \'n\' "Roll"']})
+        self.assertEqual(statement, 'select id from items where title = ?')
+        self.assertEqual(params, ['Rock \'n\' "Roll"'])
+
+    def test_statements_are_cached_by_shape(self):
+        first, _ = self.builder.select('id', 'albums', {'genre': ['Pop']},
+                                       ALBUM_COLUMNS)
+        second, _ = self.builder.select('id', 'albums', {'genre': ['Rock']},
+                                        ALBUM_COLUMNS)
+        self.assertIs(first, second)
+        self.assertEqual((self.builder.hits, self.builder.misses), (1, 1))
+        self.assertEqual(len(self.builder), 1)
@@ -0,0 +1,67 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mopidy_beetslocal import snapshot
+from mopidy_beetslocal.changes import ChangeTracker
+from mopidy_beetslocal.distinct import DistinctIndex
+from mopidy_beetslocal.index import LibraryIndex
+
+from tests import make_library
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.library = os.path.join(self.tempdir, 'library.db')
+        self.path = self.library + '.snapshot'
+        self.lib = make_library(self.library)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_read_write(self):
+        self.assertIsNone(snapshot.read(self.path, self.library, []))
+        snapshot.write(self.path, self.library, {'paths': [(1, b'/a')]})
+        self.assertEqual(snapshot.read(self.path, self.library, ['paths']),
+                         {'paths': [(1, b'/a')]})
+        self.assertIsNone(snapshot.read(self.path, 'other.db', ['paths']))
+        self.assertIsNone(snapshot.read(self.path, self.library, ['index']))
+        with open(self.path, 'wb') as f:
+            f.write(b'garbage')
+        self.assertIsNone(snapshot.read(self.path, self.library, []))
+
+    def test_round_trip(self):
+        self.lib.get_item(2).remove()
+        index = LibraryIndex.from_library(self.lib)
+        index.reload(self.lib, [2], [])
+        distinct = DistinctIndex.from_library(self.lib)
+        tracker = ChangeTracker()
+        tracker.scan(self.lib)
+        snapshot.write(self.path, self.library, {
+            'index': index.to_snapshot(),
+            'distinct': distinct.to_snapshot(),
+            'changes': tracker.to_snapshot()})
+        state = snapshot.read(self.path, self.library, [])
+
+        restored = LibraryIndex.from_snapshot(state['index'])
+        self.assertEqual(list(restored.iter_items()),
+                         list(index.iter_items()))
+        self.assertEqual(restored.search_albums({'any': ['pop']}),
+                         index.search_albums({'any': ['pop']}))
+        self.assertEqual(restored.items.dead, index.items.dead)
+        self.assertEqual(
+            DistinctIndex.from_snapshot(state['distinct']).distinct('album'),
+            distinct.distinct('album'))
+
+        tracker = ChangeTracker.from_snapshot(state['changes'])
+        self.assertFalse(tracker.changed(self.lib))
+        item = self.lib.get_item(3)
+        item.mtime = 42.0
+        item.store()
+        self.assertTrue(tracker.changed(self.lib))
+        self.assertEqual(tracker.scan(self.lib).items, set([3]))
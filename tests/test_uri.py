@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import unittest
+
+from mopidy_beetslocal import uri
+
+
+class UriTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        self.assertEqual(uri.parse(uri.track_uri(42)), ('track', 42, ''))
+        self.assertEqual(uri.parse(uri.album_uri(7)), ('album', 7, ''))
+
+    def test_parse_legacy(self):
+        self.assertEqual(uri.parse('beetslocal:track:3:/music/a:b.mp3'),
+                         ('track', 3, '/music/a:b.mp3'))
+        self.assertEqual(uri.parse('beetslocal:track:3'), ('track', 3, ''))
+
+    def test_parse_invalid(self):
+        for value in ('foo', 'beetslocal:root', 'beetslocal:track:x:',
+                      'local:track:1:'):
+            self.assertRaises(ValueError, uri.parse, value)
+
+    def test_file_uri(self):
+        self.assertEqual(uri.file_uri('/music/Sigur Rós/01.flac'),
+                         'file:///music/Sigur%20R%C3%B3s/01.flac')
+        self.assertEqual(uri.file_uri(b'/music/a#b.mp3'),
+                         'file:///music/a%23b.mp3')
+
+    def test_artist_uri(self):
+        self.assertEqual(uri.artist_uri('composer', 'Björk: a/b'),
+                         'beetslocal:composer:Bj%C3%B6rk%3A%20a%2Fb:')
+        self.assertEqual(uri.artist_uri('artist', None), 'beetslocal:artist::')